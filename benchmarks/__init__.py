@@ -0,0 +1,4 @@
+'''Offline benchmarks of the download and info paths, against a local fake YouTube server.
+
+Run them with ``python -m benchmarks.run``; see run.py for the options.
+'''
@@ -0,0 +1,193 @@
+'''Local stand-in for the parts of YouTube the downloader talks to.
+
+The server answers on 127.0.0.1 with deterministic content, so benchmark runs
+need no network and can be compared between commits:
+
+- GET  /watch?v=ID                 watch page HTML with the video details embedded
+- POST /youtubei/v1/player         player response JSON with the stream list
+- GET  /playlist?list=ID           first playlist page (also used for channel tabs)
+- POST /youtubei/v1/browse         the next playlist page for a continuation token
+- GET  /media/ID/ITAG              media bytes, honouring Range requests
+
+Every page and API answer waits `latency` seconds first, media waits
+`media_latency` before its first byte, and `link_speed` optionally caps the
+bytes per second of each media connection like a real uplink would. With
+`ranges=False` media ignores Range headers and always sends the whole file, like
+the servers the downloader has to fall back to a single connection for.
+'''
+
+import http.server
+import json
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs,urlsplit
+
+
+BLOCK = bytes(range(256)) * 256     #64 KiB repeated to make up media of any size.
+PAGE_SIZE = 100     #Videos per playlist page, like YouTube.
+STREAMS = (     #itag, resolution, mime subtype, progressive, audio only, abr, share of media_size.
+    (22,"720p","mp4",True,False,None,1.0),
+    (18,"360p","mp4",True,False,None,0.4),
+    (140,None,"mp4",False,True,"128kbps",0.1),
+)
+
+
+def bench_video_id(index):
+    '''Returns the 11 character ID of the index-th video the server knows'''  #Docstring
+    return f"bv{index:09d}"
+
+
+class FakeYouTubeServer(http.server.ThreadingHTTPServer):
+    '''Threaded HTTP server holding the benchmark settings'''
+
+    daemon_threads = True
+
+    def __init__(self,media_size=8 * 1024 * 1024,latency=0.05,media_latency=None,link_speed=None,playlist_length=200,page_kb=300,ranges=True):
+        super().__init__(("127.0.0.1",0),FakeYouTubeHandler)
+        self.media_size = int(media_size)
+        self.latency = latency
+        self.media_latency = latency if media_latency is None else media_latency
+        self.link_speed = link_speed
+        self.ranges = ranges
+        self.playlist_length = playlist_length
+        self.padding = "x" * (page_kb * 1024)   #Real watch pages are several hundred KB of markup and scripts.
+        self.requests = {}  #Maps endpoint -> number of requests, to check what a run asked for.
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        '''Serves on a background thread and returns the server'''
+        self._thread = threading.Thread(target=self.serve_forever,name="fake-youtube",daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self,request,client_address):
+        '''Stays quiet about clients hanging up mid-response, which a Range fallback does on purpose'''
+        if not isinstance(sys.exc_info()[1],ConnectionError):
+            super().handle_error(request,client_address)
+
+    def count(self,endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint,0) + 1
+
+    def stream_size(self,itag):
+        '''Returns the byte size of a stream of every video'''
+        share = next(stream[6] for stream in STREAMS if stream[0] == itag)
+        return max(1,int(self.media_size * share))
+
+    def video_details(self,video_id):
+        '''Returns the details embedded in a watch page'''
+        number = int(re.sub(r"\D","",video_id) or 0)
+        return {"videoId": video_id,"title": f"Benchmark video {video_id}","author": "Benchmark channel","channelId": "UCbenchmark",
+                "lengthSeconds": str(60 + number % 600),"viewCount": str(1000 + number),"keywords": ["benchmark","offline"],
+                "shortDescription": "Deterministic stand-in video. " * 20,"publishDate": "2024-01-01",
+                "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}
+
+    def playlist_page(self,list_id,start):
+        '''Returns the video IDs of one page of a playlist and the continuation token of the next one'''
+        end = min(self.playlist_length,start + PAGE_SIZE)
+        offset = sum(map(ord,list_id)) * 1000     #Different playlists list different videos.
+        videos = [bench_video_id(offset + index) for index in range(start,end)]
+        return videos,(f"{list_id}:{end}" if end < self.playlist_length else None)
+
+
+class FakeYouTubeHandler(http.server.BaseHTTPRequestHandler):
+    '''Answers the endpoints listed in the module docstring'''
+
+    protocol_version = "HTTP/1.1"   #Keep-alive, so connection reuse can be measured.
+
+    def log_message(self,format,*args):
+        pass
+
+    def send_body(self,body,content_type="text/html; charset=utf-8",status=200):
+        body = body.encode("utf-8") if isinstance(body,str) else body
+        self.send_response(status)
+        self.send_header("Content-Type",content_type)
+        self.send_header("Content-Length",str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path.startswith("/media/"):
+            return self.send_media(parts.path)
+
+        time.sleep(self.server.latency)
+        if parts.path == "/watch":
+            self.server.count("watch")
+            details = self.server.video_details(query.get("v",[""])[0])
+            return self.send_body(f"<html><head><script>var ytInitialData = {json.dumps(details)};</script></head>"
+                                  f"<body><!--{self.server.padding}--></body></html>")
+        if parts.path == "/playlist":
+            self.server.count("playlist")
+            list_id = query.get("list",[""])[0]
+            videos,continuation = self.server.playlist_page(list_id,0)
+            data = {"title": f"Benchmark playlist {list_id}","owner": "Benchmark channel","ownerId": "UCbenchmark",
+                    "length": self.server.playlist_length,"views": 12345,"lastUpdated": "2024-01-01","videos": videos,"continuation": continuation}
+            return self.send_body(f"<html><script>var ytInitialData = {json.dumps(data)};</script><!--{self.server.padding}--></html>")
+        self.send_body("Not found",status=404)
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        payload = self.read_json()
+        time.sleep(self.server.latency)
+        if parts.path == "/youtubei/v1/player":
+            self.server.count("player")
+            video_id = payload.get("videoId","")
+            formats = [{"itag": itag,"url": f"{self.server.base_url}/media/{video_id}/{itag}","mimeType": f"{'audio' if audio_only else 'video'}/{subtype}",
+                        "qualityLabel": resolution,"contentLength": str(self.server.stream_size(itag)),"progressive": progressive,
+                        "audioOnly": audio_only,"abr": abr,"fps": 30} for itag,resolution,subtype,progressive,audio_only,abr,share in STREAMS]
+            return self.send_body(json.dumps({"videoDetails": self.server.video_details(video_id),"streamingData": {"formats": formats}}),"application/json")
+        if parts.path == "/youtubei/v1/browse":
+            self.server.count("browse")
+            list_id,start = payload.get("continuation","").rsplit(":",1)
+            videos,continuation = self.server.playlist_page(list_id,int(start))
+            return self.send_body(json.dumps({"videos": videos,"continuation": continuation}),"application/json")
+        self.send_body("Not found",status=404)
+
+    def send_media(self,path):
+        '''Sends the bytes of /media/ID/ITAG, or the requested range of them'''
+        self.server.count("media")
+        itag = int(path.rsplit("/",1)[1])
+        size = self.server.stream_size(itag)
+        start,end = 0,size - 1
+        match = re.match(r"bytes=(\d+)-(\d*)",self.headers.get("Range") or "") if self.server.ranges else None
+        if match:
+            start = int(match.group(1))
+            end = min(size - 1,int(match.group(2))) if match.group(2) else size - 1
+
+        time.sleep(self.server.media_latency)
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header("Content-Range",f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Type","video/mp4")
+        self.send_header("Content-Length",str(end - start + 1))
+        self.end_headers()
+
+        link_speed = self.server.link_speed
+        began = time.monotonic()
+        position = start
+        while position <= end:
+            offset = position % len(BLOCK)
+            piece = BLOCK[offset:offset + min(len(BLOCK) - offset,end - position + 1)]
+            self.wfile.write(piece)
+            position += len(piece)
+            if link_speed:  #Pace this connection to link_speed bytes per second.
+                ahead = (position - start) / link_speed - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
@@ -0,0 +1,253 @@
+'''Runs the offline benchmarks and writes or compares their results.
+
+    python -m benchmarks.run                                 all scenarios, default sizes
+    python -m benchmarks.run --videos 20 --media-size 16M --latency 0.1
+    python -m benchmarks.run --output before.json            save the numbers of this commit
+    python -m benchmarks.run --compare before.json           print the change against them
+
+Every scenario runs against a fresh fake server state, an empty metadata cache
+and an empty download folder, --repeat times. Wall time, MiB/s and peak Python
+memory are the median over the repeats; the latency percentiles pool the
+per-video (or per-lookup) times of every repeat. Peak memory comes from
+tracemalloc, so it counts Python allocations only, not socket buffers.
+'''
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from youtube_downloader import core
+from youtube_downloader.metrics import metrics
+from youtube_downloader.ratelimit import parse_rate
+from youtube_downloader.segmented import default_pool
+
+from . import standins
+from .fake_server import FakeYouTubeServer,bench_video_id
+
+
+SCENARIOS = ("video_download","playlist_download","video_info","playlist_info","channel_info")
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLbenchmark"
+CHANNEL_URL = "https://www.youtube.com/@benchmark"
+
+
+def percentile(values,fraction):
+    '''Returns the nearest-rank percentile of values, or None if there are none'''  #Docstring
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0,min(len(ordered) - 1,round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def video_url(index):
+    return f"https://www.youtube.com/watch?v={bench_video_id(index)}"
+
+
+def run_video_download(config,folder):
+    '''Downloads the videos one after another, as the Video tab and the video command do'''  #Docstring
+    for index in range(config["videos"]):
+        success,message = core.video_download(link=video_url(index),savepath=folder,res="720p",format="mp4",segments=config["segments"])
+        if not success:
+            raise RuntimeError(message)
+    return [record["seconds"] for record in list(metrics.recent)[-config["videos"]:]]
+
+
+def run_playlist_download(config,folder):
+    '''Downloads a playlist of the videos with the worker pool'''  #Docstring
+    success,message = core.playlist_download(link=PLAYLIST_URL,res="720p",format="mp4",path=folder,workers=config["workers"],segments=config["segments"])
+    if not success or message != "All videos downloaded successfully":
+        raise RuntimeError(message)
+    return [record["seconds"] for record in list(metrics.recent)[-config["videos"]:]]
+
+
+def run_video_info(config,folder):
+    '''Looks the details of every video up, as the Video Info tab does'''  #Docstring
+    latencies = []
+    for index in range(config["videos"]):
+        start = time.perf_counter()
+        core.fetch_video_info(video_url(index))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_list_info(fetch,url):
+    '''Fetches the details of a playlist or channel, then lists all its videos'''  #Docstring
+    start = time.perf_counter()
+    fetch(url)
+    source = core.get_playlist(url) if fetch is core.fetch_playlist_info else core.get_channel(url)
+    listed = sum(1 for _ in core.iter_video_urls(source))
+    if listed != source.length:
+        raise RuntimeError(f"Listed {listed} of {source.length} videos")
+    return [time.perf_counter() - start]
+
+
+RUNNERS = {
+    "video_download": run_video_download,
+    "playlist_download": run_playlist_download,
+    "video_info": run_video_info,
+    "playlist_info": lambda config,folder: run_list_info(core.fetch_playlist_info,PLAYLIST_URL),
+    "channel_info": lambda config,folder: run_list_info(core.fetch_channel_info,CHANNEL_URL),
+}
+
+
+def run_once(name,config,server):
+    '''Runs one repeat of a scenario and returns its measurements'''  #Docstring
+    folder = tempfile.mkdtemp(prefix="ytd-bench-")
+    core.cache.clear()  #Every repeat starts cold, as a new process would.
+    server.requests.clear()
+    server.playlist_length = config["videos"] if name == "playlist_download" else config["playlist_length"]
+    pool_before = default_pool.stats()
+    transferred_before = metrics.snapshot()["transferred"]
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        latencies = RUNNERS[name](config,folder)
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        shutil.rmtree(folder,ignore_errors=True)
+
+    pool_after = default_pool.stats()
+    transferred = metrics.snapshot()["transferred"] - transferred_before
+    return {"wall_seconds": wall,"bytes": transferred,"latencies": latencies,"peak_bytes": peak,"server_requests": dict(server.requests),
+            "http_requests": pool_after["requests"] - pool_before["requests"],
+            "connections_opened": pool_after["connections_opened"] - pool_before["connections_opened"]}
+
+
+def summarize(runs):
+    '''Reduces the repeats of a scenario to the numbers that are compared between commits'''  #Docstring
+    latencies = [value for run in runs for value in run["latencies"]]
+    wall = statistics.median(run["wall_seconds"] for run in runs)
+    transferred = statistics.median(run["bytes"] for run in runs)
+    return {"wall_seconds": round(wall,4),
+            "mib_per_sec": round(transferred / wall / 2 ** 20,2) if transferred and wall else None,
+            "latency_p50": round(percentile(latencies,0.50),4),
+            "latency_p90": round(percentile(latencies,0.90),4),
+            "latency_p99": round(percentile(latencies,0.99),4),
+            "peak_mib": round(statistics.median(run["peak_bytes"] for run in runs) / 2 ** 20,2),
+            "http_requests": runs[-1]["http_requests"],
+            "connections_opened": runs[-1]["connections_opened"],
+            "server_requests": runs[-1]["server_requests"],
+            "repeats": len(runs)}
+
+
+def git_revision():
+    '''Returns the commit being measured and whether the tree has uncommitted changes'''  #Docstring
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git","rev-parse","HEAD"],cwd=root,capture_output=True,text=True,check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git","status","--porcelain","--untracked-files=no"],cwd=root,capture_output=True,text=True).stdout.strip())
+    except (OSError,subprocess.CalledProcessError):
+        return None,None
+    return commit,dirty
+
+
+def run_benchmarks(config,scenarios=SCENARIOS,log=None):
+    '''Runs the scenarios against a fresh fake server and returns the results document'''  #Docstring
+    log = log or (lambda text: None)
+    server = FakeYouTubeServer(media_size=config["media_size"],latency=config["latency"],link_speed=config["link_speed"],page_kb=config["page_kb"]).start()
+    restore = standins.install(server.base_url)
+    tracemalloc.start()
+    results = {}
+    try:
+        for name in scenarios:
+            runs = []
+            for repeat in range(config["repeat"]):
+                runs.append(run_once(name,config,server))
+                log(f"{name} {repeat + 1}/{config['repeat']}: {runs[-1]['wall_seconds']:.3f}s")
+            results[name] = summarize(runs)
+    finally:
+        tracemalloc.stop()
+        restore()
+        server.stop()
+        default_pool.close()
+
+    commit,dirty = git_revision()
+    return {"commit": commit,"dirty": dirty,"time": time.strftime("%Y-%m-%dT%H:%M:%S"),"python": platform.python_version(),
+            "platform": platform.platform(),"config": config,"scenarios": results}
+
+
+COMPARED = (("wall_seconds",False),("mib_per_sec",True),("latency_p50",False),("latency_p99",False),("peak_mib",False))   #(column,higher is better)
+
+
+def compare(baseline,current):
+    '''Returns a text table of the change of every scenario against a baseline results document'''  #Docstring
+    lines = [f"baseline {(baseline.get('commit') or '?')[:10]}  vs  current {(current.get('commit') or '?')[:10]}{' (dirty)' if current.get('dirty') else ''}"]
+    settings = lambda results: {key: value for key,value in results.get("config",{}).items() if key != "repeat"}
+    if settings(baseline) != settings(current):
+        lines.append("warning: the runs used different settings, the numbers are not comparable")
+    lines.append(f"{'scenario':<18}" + "".join(f"{column:>24}" for column,higher in COMPARED))
+    for name,now in current["scenarios"].items():
+        before = baseline.get("scenarios",{}).get(name)
+        if before is None:
+            continue
+        cells = []
+        for column,higher in COMPARED:
+            old,new = before.get(column),now.get(column)
+            if old is None or new is None:
+                cells.append(f"{'-':>24}")
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            better = change > 0 if higher else change < 0
+            mark = "+" if better and abs(change) >= 5 else "-" if not better and abs(change) >= 5 else " "     #Changes under 5% are noise.
+            cells.append(f"{f'{old:g} -> {new:g} ({change:+.0f}%){mark}':>24}")
+        lines.append(f"{name:<18}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def size_argument(text):
+    '''argparse type for sizes such as 8M or 512K'''  #Docstring
+    size = parse_rate(text)
+    if not size:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    return int(size)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",description="Offline benchmarks against a local fake YouTube server.")
+    parser.add_argument("--scenarios",nargs="+",choices=SCENARIOS,default=list(SCENARIOS),help="scenarios to run (default: all)")
+    parser.add_argument("--videos",type=int,default=8,help="videos downloaded or looked up per scenario (default: 8)")
+    parser.add_argument("--playlist-length",type=int,default=250,help="videos listed by the playlist and channel info scenarios (default: 250)")
+    parser.add_argument("--media-size",type=size_argument,default=size_argument("8M"),help="size of the 720p stream of every video (default: 8M)")
+    parser.add_argument("--latency",type=float,default=0.05,help="seconds before every page, API and media answer (default: 0.05)")
+    parser.add_argument("--link-speed",type=size_argument,default=None,help="bytes per second cap of every media connection, e.g. 20M (default: none)")
+    parser.add_argument("--page-kb",type=int,default=300,help="size of the watch and playlist pages in KB (default: 300)")
+    parser.add_argument("--workers",type=int,default=4,help="parallel videos of the playlist download (default: 4)")
+    parser.add_argument("--segments",type=int,default=core.DEFAULT_SEGMENTS,help=f"byte ranges per stream (default: {core.DEFAULT_SEGMENTS})")
+    parser.add_argument("--repeat",type=int,default=3,help="runs of every scenario (default: 3)")
+    parser.add_argument("--output",metavar="FILE",help="write the results as JSON to FILE")
+    parser.add_argument("--compare",metavar="FILE",help="print the change against the results in FILE")
+    return parser
+
+
+def main(argv=None):
+    '''Runs the benchmarks and returns the process exit code'''  #Docstring
+    args = build_parser().parse_args(argv)
+    config = {"videos": args.videos,"playlist_length": args.playlist_length,"media_size": args.media_size,"latency": args.latency,
+              "link_speed": args.link_speed,"page_kb": args.page_kb,"workers": args.workers,"segments": args.segments,"repeat": max(1,args.repeat)}
+    results = run_benchmarks(config,args.scenarios,log=lambda text: print(text,file=sys.stderr))
+
+    print(f"{'scenario':<18}{'wall s':>9}{'MiB/s':>9}{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}{'peak MiB':>10}{'requests':>10}{'conns':>7}")
+    for name,summary in results["scenarios"].items():
+        print(f"{name:<18}{summary['wall_seconds']:>9.3f}{summary['mib_per_sec'] or '-':>9}{summary['latency_p50']:>9.3f}{summary['latency_p90']:>9.3f}"
+              f"{summary['latency_p99']:>9.3f}{summary['peak_mib']:>10.2f}{summary['http_requests']:>10}{summary['connections_opened']:>7}")
+
+    if args.output:
+        with open(args.output,"w",encoding="utf-8") as f:
+            json.dump(results,f,indent=2)
+    if args.compare:
+        with open(args.compare,encoding="utf-8") as f:
+            print(compare(json.load(f),results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+'''YouTube, Playlist and Channel stand-ins that read from the fake server.
+
+They offer the attributes youtube_downloader.core uses and fetch lazily like
+pytubefix does (the watch page on first access, the player response on first
+access to streams), through pytubefix.request, so every request still goes
+through session's connection pool, the request rate limit and the metadata
+cache. Only pytubefix's HTML and signature parsing is left out, which keeps the
+numbers about this package rather than about YouTube's page layout.
+'''
+
+import datetime
+import json
+import os
+import re
+import threading
+
+from pytubefix import request
+
+from youtube_downloader import core
+from youtube_downloader.urls import channel_key,playlist_id,video_id
+
+
+INITIAL_DATA = re.compile(r"var ytInitialData = (\{.*?\});</script>")
+CHUNK_SIZE = 256 * 1024     #Bytes per read of the sequential fallback download.
+
+_server = {"base": None}    #Base URL of the fake server the stand-ins read from.
+
+
+def initial_data(html):
+    '''Returns the JSON embedded in a fake watch or playlist page'''  #Docstring
+    return json.loads(INITIAL_DATA.search(html).group(1))
+
+
+class BenchStream:
+    '''One entry of the player response's stream list'''
+
+    def __init__(self,data,title,on_progress):
+        self.itag = data["itag"]
+        self.url = data["url"]
+        self.mime_type = data["mimeType"]
+        self.type,self.subtype = self.mime_type.split("/")
+        self.resolution = data["qualityLabel"]
+        self.filesize = int(data["contentLength"])
+        self.is_progressive = data["progressive"]
+        self.includes_audio_track = self.is_progressive or data["audioOnly"]
+        self.includes_video_track = not data["audioOnly"]
+        self.abr = data["abr"]
+        self.fps = data["fps"]
+        self.default_filename = f"{title}.{self.subtype}"
+        self._on_progress = on_progress
+
+    def download(self,output_path=None,filename=None):
+        '''Sequential single-connection download, like pytubefix's Stream.download'''
+        path = os.path.join(output_path or os.getcwd(),filename or self.default_filename)
+        response = request._execute_request(self.url)
+        remaining = self.filesize
+        with open(path,"wb") as file:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                file.write(chunk)
+                remaining -= len(chunk)
+                self._on_progress(self,chunk,remaining)
+        return path
+
+
+class BenchYouTube:
+    '''Video whose watch page and player response come from the fake server'''
+
+    def __init__(self,url):
+        self.video_id = video_id(url)
+        if self.video_id is None:
+            raise core.RegexMatchError(caller="BenchYouTube",pattern="watch?v=")
+        self.watch_url = url
+        self._lock = threading.Lock()
+        self._details = None
+        self._streams = None
+        self._on_progress = lambda stream,chunk,bytes_remaining: None
+
+    @property
+    def watch_html(self):
+        '''Fetches the watch page on first access'''
+        with self._lock:
+            if self._details is None:
+                self._details = initial_data(request.get(f"{_server['base']}/watch?v={self.video_id}"))
+        return self._details
+
+    @property
+    def streams(self):
+        '''Fetches the player response on first access'''
+        with self._lock:
+            if self._streams is None:
+                player = json.loads(request.post(f"{_server['base']}/youtubei/v1/player",data={"videoId": self.video_id}))
+                self._streams = [BenchStream(data,self.video_id,self._progress) for data in player["streamingData"]["formats"]]
+        return self._streams
+
+    def register_on_progress_callback(self,func):
+        self._on_progress = func
+
+    def _progress(self,stream,chunk,bytes_remaining):
+        self._on_progress(stream,chunk,bytes_remaining)     #Looked up per call, the callback may be replaced.
+
+    title = property(lambda self: self.watch_html["title"])
+    description = property(lambda self: self.watch_html["shortDescription"])
+    rating = property(lambda self: None)
+    length = property(lambda self: int(self.watch_html["lengthSeconds"]))
+    views = property(lambda self: int(self.watch_html["viewCount"]))
+    likes = property(lambda self: None)
+    author = property(lambda self: self.watch_html["author"])
+    keywords = property(lambda self: self.watch_html["keywords"])
+    channel_id = property(lambda self: self.watch_html["channelId"])
+    channel_url = property(lambda self: f"https://www.youtube.com/channel/{self.channel_id}")
+    thumbnail_url = property(lambda self: self.watch_html["thumbnail"])
+    publish_date = property(lambda self: datetime.datetime.fromisoformat(self.watch_html["publishDate"]))
+
+
+class BenchPlaylist:
+    '''Playlist whose pages come from the fake server, 100 videos per page'''
+
+    def __init__(self,url):
+        self.playlist_id = playlist_id(url)
+        if self.playlist_id is None:
+            raise core.RegexMatchError(caller="BenchPlaylist",pattern="list=")
+        self.playlist_url = url
+        self._lock = threading.Lock()
+        self._first_page = None
+
+    @property
+    def initial_data(self):
+        with self._lock:
+            if self._first_page is None:
+                self._first_page = initial_data(request.get(f"{_server['base']}/playlist?list={self.playlist_id}"))
+        return self._first_page
+
+    def url_generator(self):
+        '''Yields the video URLs, fetching each continuation page once the previous one is used up'''
+        page = self.initial_data
+        while True:
+            for vid in page["videos"]:
+                yield f"https://www.youtube.com/watch?v={vid}"
+            if not page["continuation"]:
+                return
+            page = json.loads(request.post(f"{_server['base']}/youtubei/v1/browse",data={"continuation": page["continuation"]}))
+
+    @property
+    def video_urls(self):
+        return list(self.url_generator())
+
+    title = property(lambda self: self.initial_data["title"])
+    length = property(lambda self: self.initial_data["length"])
+    views = property(lambda self: self.initial_data["views"])
+    owner = property(lambda self: self.initial_data["owner"])
+    owner_id = property(lambda self: self.initial_data["ownerId"])
+    owner_url = property(lambda self: f"https://www.youtube.com/channel/{self.owner_id}")
+    last_updated = property(lambda self: self.initial_data["lastUpdated"])
+    description = property(lambda self: f"Description of {self.title}")
+    thumbnail_url = property(lambda self: f"https://i.ytimg.com/vi/{self.initial_data['videos'][0]}/hqdefault.jpg")
+
+
+class BenchChannel(BenchPlaylist):
+    '''Channel whose tabs are fake playlists named after the channel and the tab'''
+
+    def __init__(self,url):
+        key = channel_key(url)
+        if key is None:
+            raise core.RegexMatchError(caller="BenchChannel",pattern="channel/")
+        self.channel_url = f"https://www.youtube.com/{key}"
+        self.videos_url = f"{self.channel_url}/videos"
+        self.shorts_url = f"{self.channel_url}/shorts"
+        self.live_url = f"{self.channel_url}/streams"
+        self.html_url = self.videos_url
+        self._key = key
+        self._lock = threading.Lock()
+        self._first_page = None
+        self._page_of = None    #html_url the first page was read for.
+
+    @property
+    def playlist_id(self):
+        return f"{self._key}/{self.html_url.rsplit('/',1)[1]}"
+
+    @property
+    def initial_data(self):
+        with self._lock:
+            if self._first_page is None or self._page_of != self.html_url:   #iter_channel_urls switches tabs through html_url.
+                self._first_page = initial_data(request.get(f"{_server['base']}/playlist?list={self.playlist_id}"))
+                self._page_of = self.html_url
+        return self._first_page
+
+    channel_name = property(lambda self: self.initial_data["owner"])
+    channel_id = property(lambda self: self.initial_data["ownerId"])
+
+
+def install(base_url):
+    '''Points core at the stand-ins reading from base_url and returns a function undoing it'''  #Docstring
+    _server["base"] = base_url.rstrip("/")
+    originals = core.YouTube,core.Playlist,core.Channel
+    core.YouTube,core.Playlist,core.Channel = BenchYouTube,BenchPlaylist,BenchChannel
+
+    def restore():
+        core.YouTube,core.Playlist,core.Channel = originals
+    return restore
@@ -0,0 +1,35 @@
+'''Shared setup of the tests: run them with `python -m pytest` from the repository root.'''
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  #Also lets a plain `pytest` import the package.
+
+from benchmarks.fake_server import BLOCK,FakeYouTubeServer,bench_video_id
+
+
+def media_bytes(size):
+    '''Returns the first size bytes every media file of the fake server holds'''  #Docstring
+    return (BLOCK * (size // len(BLOCK) + 1))[:size]
+
+
+def media_url(server,itag=22):
+    '''Returns the URL of a stream of the fake server's first video'''  #Docstring
+    return f"{server.base_url}/media/{bench_video_id(0)}/{itag}"
+
+
+@pytest.fixture
+def fake_server():
+    '''Starts FakeYouTubeServer(**settings) without latency when called, and stops every server started after the test'''
+    servers = []
+
+    def start(**settings):
+        server = FakeYouTubeServer(**dict({"latency": 0,"page_kb": 1},**settings)).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
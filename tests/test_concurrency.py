@@ -0,0 +1,60 @@
+'''Bounded worker pool of playlist downloads (core.download_videos_concurrently).'''
+
+import threading
+import time
+
+from youtube_downloader.core import download_videos_concurrently
+
+
+def test_never_runs_more_than_workers_at_once():
+    '''Every video is downloaded once and at most `workers` run at the same time'''  #Docstring
+    lock = threading.Lock()
+    running = peak = 0
+    seen = []
+
+    def download_func(url,progress_callback):
+        nonlocal running,peak
+        with lock:
+            running += 1
+            peak = max(peak,running)
+            seen.append(url)
+        time.sleep(0.01)
+        progress_callback(1,1)
+        with lock:
+            running -= 1
+        return True,"OK"
+
+    urls = [f"https://www.youtube.com/watch?v=video{index:04d}" for index in range(40)]
+    downloaded,failed = download_videos_concurrently(urls,download_func,workers=3)
+    assert (downloaded,failed) == (40,[])
+    assert sorted(seen) == urls
+    assert 1 < peak <= 3
+
+
+def test_pulls_urls_lazily_and_reports_failures():
+    '''URLs are taken from a generator only as workers need them; failures and crashes are counted'''  #Docstring
+    taken = []
+
+    def urls():
+        for index in range(20):
+            taken.append(index)
+            yield f"https://www.youtube.com/watch?v=video{index:04d}"
+
+    taken_at_start = []
+
+    def download_func(url,progress_callback):
+        if not taken_at_start:
+            taken_at_start.append(len(taken))
+        if url.endswith("0003"):
+            raise RuntimeError("worker crashed")
+        return (False,"unavailable") if url.endswith("0005") else (True,"OK")
+
+    results = []
+    progress = []
+    downloaded,failed = download_videos_concurrently(urls(),download_func,workers=2,on_progress=progress.append,\
+                                                      on_result=lambda url,success,message: results.append((url[-4:],success,message)))
+    assert taken_at_start[0] <= 2 * 2     #Two URLs per worker at most, never the whole playlist.
+    assert downloaded == 18
+    assert sorted(url[-4:] for url in failed) == ["0003","0005"]
+    assert ("0003",False,"worker crashed") in results
+    assert progress[-1] == 1.0
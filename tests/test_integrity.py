@@ -0,0 +1,82 @@
+'''Piece digests written inline, file checks and `verify --repair` (integrity.py, archive.py).'''
+
+import hashlib
+import json
+import os
+
+from conftest import media_bytes,media_url
+from youtube_downloader import cli
+from youtube_downloader.archive import DownloadArchive,default_archive_path
+from youtube_downloader.integrity import PIECE_SIZE,InlineHasher,check_file,file_digest,plain_sha256
+from youtube_downloader.resume import MANIFEST_SUFFIX,PART_SUFFIX
+from youtube_downloader.segmented import segmented_download,split_missing
+
+
+def write_file(path,data):
+    '''Writes data to path and returns the absolute path'''  #Docstring
+    with open(path,"wb") as f:
+        f.write(data)
+    return os.path.abspath(path)
+
+
+def test_split_missing_cuts_on_piece_boundaries():
+    '''With align, every range but the first of a span starts on a piece and every range but the last ends before one'''  #Docstring
+    piece = 1024 * 1024
+    missing = [(piece // 2,7 * piece + 99),(9 * piece,12 * piece - 1)]
+    ranges = split_missing(missing,segments=4,align=piece)
+    assert sum(end - start + 1 for start,end in ranges) == sum(end - start + 1 for start,end in missing)
+    for start,end in ranges:
+        assert start in (piece // 2,9 * piece) or start % piece == 0
+        assert end in (7 * piece + 99,12 * piece - 1) or (end + 1) % piece == 0
+
+
+def test_inline_digest_matches_after_a_partial_resume(fake_server,tmp_path):
+    '''A download resumed in the middle of a piece gets the same digest as hashing the finished file'''  #Docstring
+    server = fake_server(media_size=6 * 1024 * 1024)
+    size = server.stream_size(22)
+    path = str(tmp_path / "video.mp4")
+    written = PIECE_SIZE * 5 // 2   #Two and a half pieces from an earlier attempt.
+    with open(path + PART_SUFFIX,"wb") as f:
+        f.write(media_bytes(written))
+        f.truncate(size)
+    with open(path + MANIFEST_SUFFIX,"w",encoding="utf-8") as f:
+        json.dump({"key": "itag=22","total_size": size,"completed": [[0,written - 1]]},f)
+
+    hasher = InlineHasher(size)
+    segmented_download(media_url(server),path,size,segments=4,key="itag=22",hasher=hasher)
+    assert hasher.digest(path) == file_digest(path)
+    assert hasher.reread == 3 * PIECE_SIZE    #The pieces the earlier attempt wrote to, the split one whole; not the file.
+
+
+def test_check_file_statuses(tmp_path):
+    '''check_file tells apart intact, resized, changed and deleted files, and still checks plain SHA-256 rows'''  #Docstring
+    data = os.urandom(3 * 1024 + 5)
+    path = write_file(tmp_path / "a.mp4",data)
+    digest = file_digest(path,piece_size=1024)
+    assert check_file(path,len(data),digest) == ("ok","")
+    assert check_file(path,len(data),hashlib.sha256(data).hexdigest()) == ("ok","")     #Archives written before the piece digests.
+    assert plain_sha256(path) == hashlib.sha256(data).hexdigest()
+    assert check_file(path,len(data),None)[0] == "ok"
+    assert check_file(path,len(data) + 1,digest)[0] == "size"
+    write_file(path,data[:-1] + bytes([data[-1] ^ 1]))
+    assert check_file(path,len(data),digest)[0] == "corrupt"
+    os.remove(path)
+    assert check_file(path,len(data),digest) == ("missing","")
+
+
+def test_verify_repair_deletes_damaged_files_and_forgets_them(tmp_path,capsys):
+    '''verify --repair removes corrupt files and drops them and missing ones from the archive; intact files stay'''  #Docstring
+    archive = DownloadArchive(default_archive_path(str(tmp_path)))
+    paths = {name: write_file(tmp_path / f"{name}.mp4",os.urandom(2048)) for name in ("good","corrupt","missing")}
+    for name,path in paths.items():
+        archive.add(name,"Video","720p","22",path)
+    write_file(paths["corrupt"],os.urandom(2048))
+    os.remove(paths["missing"])
+
+    assert cli.main(["verify",str(tmp_path),"--repair"]) == 1
+    assert "1 corrupt, 1 missing, 1 ok" in capsys.readouterr().out
+    assert not os.path.exists(paths["corrupt"]) and os.path.exists(paths["good"])
+    assert [entry["path"] for entry in archive.files()] == [paths["good"]]
+    assert [entry["video_id"] for entry in archive.entries()] == ["good"]
+    assert cli.main(["verify",str(tmp_path)]) == 0
+    archive.close()
@@ -0,0 +1,70 @@
+'''Token bucket limits (ratelimit.py).'''
+
+import threading
+import time
+
+import pytest
+
+from youtube_downloader.ratelimit import TokenBucket,parse_rate
+
+
+def test_shared_bucket_holds_the_rate():
+    '''Four threads taking 16 KiB chunks together stay within a few percent of the rate'''  #Docstring
+    rate = 1024 * 1024
+    bucket = TokenBucket(rate)
+    taken = []
+    start = time.monotonic()
+
+    def reader():
+        while time.monotonic() - start < 1.5:
+            bucket.acquire(16 * 1024)
+            taken.append(16 * 1024)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    achieved = sum(taken) / (time.monotonic() - start)
+    assert achieved == pytest.approx(rate,rel=0.05)
+
+
+def test_unlimited_bucket_never_waits():
+    '''A bucket without a rate returns right away'''  #Docstring
+    bucket = TokenBucket(None)
+    assert bucket.acquire(10 ** 9) < 0.01
+
+
+def test_raising_the_rate_wakes_waiting_threads():
+    '''A thread waiting at the old rate recomputes its delay as soon as the rate changes'''  #Docstring
+    bucket = TokenBucket(100)
+    waited = []
+    thread = threading.Thread(target=lambda: waited.append(bucket.acquire(100)))    #Needs a whole second at 100/s.
+    thread.start()
+    time.sleep(0.1)
+    bucket.set_rate(100000)
+    thread.join(timeout=5)
+    assert waited and waited[0] < 0.5
+
+
+def test_lifting_the_limit_releases_waiting_threads():
+    '''set_rate(None) lets waiting threads go'''  #Docstring
+    bucket = TokenBucket(10)
+    thread = threading.Thread(target=bucket.acquire,args=(10,))
+    thread.start()
+    time.sleep(0.1)
+    bucket.set_rate(None)
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+
+
+@pytest.mark.parametrize("text,rate",[("500K",500 * 1024),("2.5M",2.5 * 1024 ** 2),("1048576",1048576),("2MiB/s",2 * 1024 ** 2),("0",None),("",None),("none",None)])
+def test_parse_rate(text,rate):
+    '''Rates are bytes per second with K/M/G suffixes; 0 and empty mean unlimited'''  #Docstring
+    assert parse_rate(text) == rate
+
+
+def test_parse_rate_rejects_garbage():
+    '''Text that is not a rate raises ValueError'''  #Docstring
+    with pytest.raises(ValueError):
+        parse_rate("fast")
@@ -0,0 +1,76 @@
+'''Resuming interrupted downloads from their .part file and sidecar (resume.py).'''
+
+import json
+import os
+
+from conftest import media_bytes,media_url
+from youtube_downloader.resume import MANIFEST_SUFFIX,PART_SUFFIX,PartialDownload,is_complete,merge_ranges
+from youtube_downloader.segmented import segmented_download
+
+
+def write_partial(path,size,completed,key="itag=22",part_size=None):
+    '''Leaves the .part file and sidecar of an interrupted download; completed bytes hold a marker, not the media'''  #Docstring
+    with open(path + PART_SUFFIX,"wb") as f:
+        f.truncate(size if part_size is None else part_size)
+        for start,end in completed:
+            f.seek(start)
+            f.write(b"R" * (end - start + 1))   #Kept as is if the download really resumes.
+    with open(path + MANIFEST_SUFFIX,"w",encoding="utf-8") as f:
+        json.dump({"key": key,"total_size": size,"completed": completed},f)
+
+
+def test_merge_ranges_joins_touching_ranges():
+    '''Overlapping and adjacent ranges become one, in order'''  #Docstring
+    assert merge_ranges([[10,19],[0,4],[5,9],[30,40]]) == [[0,19],[30,40]]
+
+
+def test_missing_ranges_after_load(tmp_path):
+    '''load() keeps the sidecar's ranges and missing_ranges() returns the gaps between them'''  #Docstring
+    path = str(tmp_path / "video.mp4")
+    write_partial(path,1000,[[0,99],[500,599]])
+    state = PartialDownload(path,1000,key="itag=22").load()
+    assert state.bytes_done() == 200
+    assert state.missing_ranges() == [(100,499),(600,999)]
+
+
+def test_resume_fetches_only_the_missing_bytes(fake_server,tmp_path):
+    '''Bytes the sidecar lists as written are not downloaded again'''  #Docstring
+    server = fake_server(media_size=6 * 1024 * 1024)
+    size = server.stream_size(22)
+    path = str(tmp_path / "video.mp4")
+    written = [[0,2 * 1024 * 1024 - 1],[4 * 1024 * 1024,4 * 1024 * 1024 + 99]]
+    write_partial(path,size,written)
+    progress = []
+    segmented_download(media_url(server),path,size,segments=4,key="itag=22",progress_callback=lambda done,total: progress.append(done))
+
+    expected = bytearray(media_bytes(size))
+    for start,end in written:
+        expected[start:end + 1] = b"R" * (end - start + 1)
+    with open(path,"rb") as f:
+        assert f.read() == bytes(expected)
+    assert progress[0] == 2 * 1024 * 1024 + 100     #Starts from what the earlier attempt wrote.
+    assert progress[-1] == size
+    assert is_complete(path,size)
+    assert not os.path.exists(path + MANIFEST_SUFFIX)
+
+
+def test_truncated_part_or_other_stream_starts_over(fake_server,tmp_path):
+    '''A .part file of the wrong size, or one written for another stream, is downloaded from scratch'''  #Docstring
+    server = fake_server(media_size=2 * 1024 * 1024)
+    size = server.stream_size(22)
+    for name,settings in (("truncated.mp4",{"part_size": 1000}),("other.mp4",{"key": "itag=18"})):
+        path = str(tmp_path / name)
+        write_partial(path,size,[[0,999]],**settings)
+        segmented_download(media_url(server),path,size,segments=2,key="itag=22")
+        with open(path,"rb") as f:
+            assert f.read() == media_bytes(size)
+
+
+def test_damaged_sidecar_starts_over(tmp_path):
+    '''A sidecar that is not valid JSON is ignored'''  #Docstring
+    path = str(tmp_path / "video.mp4")
+    write_partial(path,1000,[[0,99]])
+    with open(path + MANIFEST_SUFFIX,"w",encoding="utf-8") as f:
+        f.write('{"key": "itag=22", "total_')  #Cut off mid-write.
+    state = PartialDownload(path,1000,key="itag=22").load()
+    assert state.missing_ranges() == [(0,999)]
@@ -0,0 +1,69 @@
+'''Classifying download errors, the backoff delay and the retry report (retry.py).'''
+
+import socket
+from urllib.error import HTTPError,URLError
+
+import pytest
+from pytubefix.exceptions import MaxRetriesExceeded,RegexMatchError,VideoUnavailable
+
+from youtube_downloader.retry import BACKOFF_CAP,RetryReport,backoff_delay,classify
+from youtube_downloader.segmented import RangeNotSupported,SegmentedDownloadError
+
+
+def http_error(code):
+    '''Returns the HTTPError urllib raises for status code'''  #Docstring
+    return HTTPError("https://www.youtube.com/watch?v=x",code,"status",{},None)
+
+
+def media_error(status=None,cause=None):
+    '''Returns a SegmentedDownloadError with the given status, raised from cause'''  #Docstring
+    error = SegmentedDownloadError("range failed",status=status)
+    error.__cause__ = cause
+    return error
+
+
+@pytest.mark.parametrize("error,expected",[
+    (RegexMatchError("watch_url","pattern"),"terminal"),
+    (VideoUnavailable("x"),"terminal"),
+    (http_error(429),"retryable"),
+    (http_error(503),"retryable"),
+    (http_error(404),"terminal"),
+    (RangeNotSupported("no ranges"),"terminal"),
+    (media_error(),"retryable"),    #Closed early.
+    (media_error(403),"retryable"),     #Expired stream URL.
+    (media_error(404),"terminal"),
+    (media_error(cause=ConnectionResetError()),"retryable"),
+    (media_error(cause=PermissionError()),"terminal"),  #Disk errors are not fixed by waiting.
+    (URLError("connection refused"),"retryable"),
+    (TimeoutError(),"retryable"),
+    (socket.timeout(),"retryable"),
+    (MaxRetriesExceeded(),"retryable"),
+    (ValueError("unexpected"),"terminal"),
+])
+def test_classify(error,expected):
+    '''Outages and expired URLs are retried; bad input, missing videos and unknown errors are not'''  #Docstring
+    assert classify(error) == expected
+
+
+def test_backoff_delay_stays_within_bounds():
+    '''Delays are jittered between 0 and base * 2**attempt, never above the cap'''  #Docstring
+    for attempt in range(4):
+        delays = [backoff_delay(attempt,base=1.0) for _ in range(200)]
+        assert all(0 <= delay <= 2 ** attempt for delay in delays)
+        assert max(delays) > 2 ** attempt / 2     #Spread out, not a fixed value.
+    assert all(backoff_delay(20) <= BACKOFF_CAP for _ in range(200))
+
+
+def test_report_summary():
+    '''The summary counts retries, recovered videos and those that gave up; terminal errors are counted by type'''  #Docstring
+    report = RetryReport()
+    assert report.summary() == ""
+    report.finished("a",1)  #Succeeded at once.
+    report.retried("b",http_error(503))
+    report.finished("b",2)
+    report.retried("c",TimeoutError())
+    report.retried("c",TimeoutError())
+    report.finished("c",3,TimeoutError())
+    report.finished("d",1,VideoUnavailable("d"))
+    assert report.summary() == ", 3 retries (1 recovered, 1 gave up)"
+    assert report.as_dict() == {"retries": 3,"recovered": ["b"],"exhausted": ["c"],"terminal": {"VideoUnavailable": 1}}
@@ -0,0 +1,57 @@
+'''Parallel byte range downloads (segmented.py) against the local fake server.'''
+
+import os
+
+import pytest
+
+from benchmarks.standins import BenchStream
+from conftest import media_bytes,media_url
+from youtube_downloader import core
+from youtube_downloader.resume import MANIFEST_SUFFIX,PART_SUFFIX
+from youtube_downloader.segmented import RangeNotSupported,segmented_download,split_ranges
+
+
+def test_split_ranges_cover_the_file_without_gaps():
+    '''Ranges are contiguous, cover every byte and are no smaller than the minimum'''  #Docstring
+    size = 10 * 1024 * 1024 + 123
+    ranges = split_ranges(size,segments=4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == size - 1
+    assert all(end + 1 == next_start for (start,end),(next_start,next_end) in zip(ranges,ranges[1:]))
+    assert split_ranges(1000,segments=8) == [(0,999)]   #Never split below MIN_SEGMENT_SIZE.
+    assert split_ranges(0) == []
+
+
+def test_segmented_download_writes_every_byte(fake_server,tmp_path):
+    '''The ranges land at their offsets, progress reaches the full size and no .part file is left'''  #Docstring
+    server = fake_server(media_size=6 * 1024 * 1024)
+    size = server.stream_size(22)
+    path = str(tmp_path / "video.mp4")
+    progress = []
+    assert segmented_download(media_url(server),path,size,segments=4,progress_callback=lambda done,total: progress.append(done)) == path
+    with open(path,"rb") as f:
+        assert f.read() == media_bytes(size)
+    assert progress[-1] == size
+    assert server.requests["media"] == 4
+    assert not os.path.exists(path + PART_SUFFIX) and not os.path.exists(path + MANIFEST_SUFFIX)
+
+
+def test_range_not_supported_is_detected(fake_server,tmp_path):
+    '''A server answering 200 to a partial Range request raises RangeNotSupported'''  #Docstring
+    server = fake_server(media_size=6 * 1024 * 1024,ranges=False)
+    with pytest.raises(RangeNotSupported):
+        segmented_download(media_url(server),str(tmp_path / "video.mp4"),server.stream_size(22),segments=4)
+
+
+def test_download_stream_falls_back_to_one_connection(fake_server,tmp_path):
+    '''Without Range support download_stream drops the .part file and lets the stream download sequentially'''  #Docstring
+    server = fake_server(media_size=6 * 1024 * 1024,ranges=False)
+    size = server.stream_size(22)
+    data = {"itag": 22,"url": media_url(server),"mimeType": "video/mp4","qualityLabel": "720p","contentLength": str(size),\
+            "progressive": True,"audioOnly": False,"abr": None,"fps": 30}
+    stream = BenchStream(data,"fallback",lambda stream,chunk,bytes_remaining: None)
+    path = core.download_stream(stream,str(tmp_path),segments=4)
+    assert path == str(tmp_path / "fallback.mp4")
+    with open(path,"rb") as f:
+        assert f.read() == media_bytes(size)
+    assert not os.path.exists(path + PART_SUFFIX) and not os.path.exists(path + MANIFEST_SUFFIX)
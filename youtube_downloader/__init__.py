@@ -0,0 +1,44 @@
+'''Headless YouTube download and metadata core.
+
+The GUI in YouTubeDownloader_CompleteCode.py is a thin layer over these functions,
+and ``python -m youtube_downloader`` drives them from the command line.
+
+The names re-exported from core, batch, export and session are imported on
+first access: those modules load pytubefix, which takes a noticeable part of a
+second, so importing a light module such as ratelimit or filters stays fast.
+'''
+
+import importlib
+
+from .cache import MetadataCache,cache
+from .metrics import metrics
+
+
+_LAZY = {   #Maps re-exported name -> submodule it comes from.
+    "batch_download": "batch",
+    "read_url_file": "batch",
+    "export_info": "export",
+    "connection_stats": "session",
+    "is_youtube_url": "core",
+    "get_youtube": "core",
+    "get_playlist": "core",
+    "get_channel": "core",
+    "video_download": "core",
+    "download_videos_concurrently": "core",
+    "playlist_download": "core",
+    "channel_download": "core",
+    "fetch_video_info": "core",
+    "fetch_playlist_info": "core",
+    "fetch_channel_info": "core",
+}
+
+__all__ = ["MetadataCache","cache","metrics",*_LAZY]
+
+
+def __getattr__(name):
+    '''Imports the submodule behind a re-exported name the first time it is used'''  #Docstring
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_LAZY[name]}",__name__),name)
+    globals()[name] = value     #Later lookups skip this function.
+    return value
@@ -0,0 +1,7 @@
+'''Allows running the downloader without the GUI: python -m youtube_downloader --help'''
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
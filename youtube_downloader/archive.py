@@ -0,0 +1,126 @@
+'''Download archive for incremental playlist and channel syncs, and manifest of file digests.
+
+The archive is a small SQLite file, by default inside the download folder, with
+one row per (video, format, resolution) that was downloaded: the stream itag it
+came from, the file path, its size and digest. A sync run skips every listed
+video whose row still matches a file on disk, without even looking the video up,
+so re-running a large playlist only downloads what is new or has changed.
+
+The same file holds the manifest: one row per finished download, sync or not,
+with the size and the digest computed while it was written (see integrity.py),
+which ``python -m youtube_downloader verify`` checks the files against.
+'''
+
+import os
+import sqlite3
+import threading
+import time
+
+from .integrity import file_digest
+
+
+ARCHIVE_NAME = ".youtube_downloader_archive.sqlite"     #File name used inside the download folder.
+
+_manifests = {}     #Maps folder -> DownloadArchive recording its downloads, shared by every download into it.
+_manifests_lock = threading.Lock()
+
+
+def default_archive_path(folder):
+    '''Returns the path of the archive kept in a download folder'''  #Docstring
+    return os.path.join(folder,ARCHIVE_NAME)
+
+
+def folder_manifest(folder):
+    '''Returns the DownloadArchive of a download folder, opened once per process'''  #Docstring
+    folder = os.path.abspath(folder)
+    with _manifests_lock:
+        if folder not in _manifests:
+            _manifests[folder] = DownloadArchive(default_archive_path(folder))
+        return _manifests[folder]
+
+
+class DownloadArchive:
+    '''SQLite table of downloaded videos, safe to share between worker threads'''
+
+    def __init__(self,path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path,check_same_thread=False,timeout=30)    #Several jobs may sync into one folder.
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("""CREATE TABLE IF NOT EXISTS videos (
+                                video_id TEXT, format TEXT, res TEXT, itag TEXT,
+                                path TEXT, size INTEGER, sha256 TEXT, downloaded REAL,
+                                PRIMARY KEY (video_id, format, res))""")
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, digest TEXT, recorded REAL)")
+        self._db.commit()
+
+    def get(self,video_id,format,res):
+        '''Returns the archived row of a video as a dictionary, or None'''
+        with self._lock:
+            row = self._db.execute("SELECT * FROM videos WHERE video_id = ? AND format = ? AND res = ?",(video_id,format,res)).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self,video_id,format,res):
+        '''Returns True if the video was archived and its file is still on disk with the same size'''
+        entry = self.get(video_id,format,res) if video_id else None
+        if entry is None:
+            return False
+        try:
+            return os.path.getsize(entry["path"]) == entry["size"]  #Cheap check; the hash is kept for verifying.
+        except OSError:
+            return False    #Deleted or moved, download it again.
+
+    def add(self,video_id,format,res,itag,path):
+        '''Records a downloaded file with the digest taken while it was written.
+
+        Only a file without a recorded digest (e.g. one downloaded before digests
+        were recorded) is hashed here, outside the lock.
+        '''
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        digest = self.digest_of(path) or folder_manifest(os.path.dirname(path)).digest_of(path)
+        if digest is None:
+            digest = file_digest(path)
+            self.record_file(path,digest)
+        with self._lock:
+            #The sha256 column holds the digest text of integrity.py; archives written before hold plain SHA-256 hex.
+            self._db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (video_id,format,res,itag,path,size,digest,time.time()))
+            self._db.commit()
+
+    def record_file(self,path,digest):
+        '''Adds a finished file and its digest to the manifest'''
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",(path,size,digest,time.time()))
+            self._db.commit()
+
+    def digest_of(self,path):
+        '''Returns the digest recorded for a file, or None'''
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM files WHERE path = ?",(os.path.abspath(path),)).fetchone()
+        return row["digest"] if row else None
+
+    def files(self):
+        '''Returns {"path","size","digest"} of every recorded file, including videos archived before the manifest existed'''
+        with self._lock:
+            return [dict(row) for row in self._db.execute("""SELECT path, size, digest FROM files
+                                                             UNION ALL SELECT path, size, sha256 FROM videos WHERE path NOT IN (SELECT path FROM files)
+                                                             ORDER BY path""")]
+
+    def forget(self,path):
+        '''Drops a file from the manifest and the archive, so the next sync downloads it again'''
+        with self._lock:
+            self._db.execute("DELETE FROM files WHERE path = ?",(path,))
+            self._db.execute("DELETE FROM videos WHERE path = ?",(path,))
+            self._db.commit()
+
+    def entries(self):
+        '''Returns every archived row as a dictionary'''
+        with self._lock:
+            return [dict(row) for row in self._db.execute("SELECT * FROM videos ORDER BY downloaded")]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
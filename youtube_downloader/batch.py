@@ -0,0 +1,166 @@
+'''Batch downloads from a file of video, playlist and channel URLs.
+
+The file may be plain text (any http(s) URL found on a line, so notes such as
+TestData.txt work as they are), CSV (a "url" column, or every cell that is a
+URL) or JSONL (a "url" field, or a plain JSON string per line). Every URL is
+reduced to its canonical ID, the playlists and channels are expanded lazily,
+and all videos go through one shared worker pool. A video listed on its own and
+in several playlists is downloaded once.
+'''
+
+import csv
+import itertools
+import json
+import os
+import re
+
+from . import core
+from .enumeration import iter_channel_urls,iter_video_urls,prefetch,prefetch_metadata
+from .metrics import metrics
+from .urls import channel_key,playlist_id,video_id
+
+
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>,]+")   #A URL inside a line of free text.
+
+
+def read_url_file(path):
+    '''Yields the URLs listed in a .txt, .csv or .jsonl file, in file order'''  #Docstring
+    extension = os.path.splitext(path)[1].lower()
+    with open(path,newline="",encoding="utf-8-sig") as f:
+        if extension == ".csv":
+            rows = csv.reader(f)
+            header = next(rows,[])
+            columns = [index for index,name in enumerate(header) if name.strip().lower() == "url"]
+            if not columns:     #No "url" header, so the first row is data as well.
+                rows = itertools.chain([header],rows)
+            for row in rows:
+                cells = [row[index] for index in columns if index < len(row)] if columns else row
+                for cell in cells:
+                    yield from URL_PATTERN.findall(cell)
+        elif extension in (".jsonl",".ndjson"):
+            for line in f:
+                if not line.strip():
+                    continue
+                value = json.loads(line)
+                if isinstance(value,dict):
+                    value = value.get("url","")
+                if isinstance(value,str):
+                    yield from URL_PATTERN.findall(value)
+        else:
+            for line in f:
+                yield from URL_PATTERN.findall(line)
+
+
+def canonical(url):
+    '''Returns (kind,id,canonical_url) of a YouTube URL, or None if it is not one.
+
+    A watch URL inside a playlist (watch?v=...&list=...) counts as the video.
+    '''  #Docstring
+    vid = video_id(url)
+    if vid:
+        return "video",vid,f"https://www.youtube.com/watch?v={vid}"
+    list_id = playlist_id(url)
+    if list_id:
+        return "playlist",list_id,f"https://www.youtube.com/playlist?list={list_id}"
+    key = channel_key(url)
+    if key:
+        return "channel",key,f"https://www.youtube.com/{key}"
+    return None
+
+
+def unique_sources(urls):
+    '''Returns the canonical (kind,id,url) of every distinct source and the number of duplicates and invalid URLs'''  #Docstring
+    sources = {}    #Maps (kind,id) -> canonical URL, in the order first seen.
+    duplicates = invalid = 0
+    for url in urls:
+        entry = canonical(url)
+        if entry is None:
+            invalid += 1
+        elif entry[:2] in sources:
+            duplicates += 1
+        else:
+            sources[entry[:2]] = entry[2]
+    return [(kind,key,url) for (kind,key),url in sources.items()],duplicates,invalid
+
+
+def iter_unique_videos(sources,on_error=None,counts=None):
+    '''Expands (kind,id,url) sources into one stream of distinct canonical video URLs, page by page.
+
+    on_error(url,message) is told about playlists and channels that cannot be
+    listed. counts, if given, is a dictionary updated with "repeated" (videos
+    already yielded for an earlier source) and "unlisted" (failed sources).
+    '''  #Docstring
+    counts = counts if counts is not None else {}
+    counts.setdefault("repeated",0)
+    counts.setdefault("unlisted",0)
+    seen = set()    #Canonical video URLs already yielded, across every source.
+    for kind,key,url in sources:
+        try:
+            if kind == "video":
+                listed = [url]
+            elif kind == "playlist":
+                listed = iter_video_urls(core.get_playlist(url))
+            else:
+                listed = (video_url for tab,video_url in iter_channel_urls(core.Channel(url)))
+            for video_url in listed:
+                vid = video_id(video_url)
+                if vid:
+                    video_url = f"https://www.youtube.com/watch?v={vid}"
+                if video_url in seen:
+                    counts["repeated"] += 1   #Also in an earlier playlist, channel or line of the file.
+                    continue
+                seen.add(video_url)
+                yield video_url
+        except Exception as e:  #One broken playlist must not stop the rest of the batch.
+            counts["unlisted"] += 1
+            if on_error:
+                on_error(url,f"Could not list {kind}: {e}")
+
+
+def batch_download(urls,savepath,res,format,workers=4,on_progress=None,on_result=None,segments=core.DEFAULT_SEGMENTS,archive=None,limiter=None,\
+                   retries=core.DEFAULT_RETRIES,report=None):
+    '''Downloads every video of a list of video, playlist and channel URLs, each video only once'''  #Docstring
+
+    sources,duplicates,invalid = unique_sources(urls)
+    if not sources:
+        return False,"No YouTube URLs found"
+
+    counts = {}
+    report = report if report is not None else core.RetryReport()
+    run = metrics.start_run("batch",",".join(url for kind,key,url in sources[:3]))    #The first few sources name the run in the log.
+    on_error = (lambda url,message: on_result(url,False,message)) if on_result else None
+
+    def download_func(url,progress_callback):
+        if archive is not None:
+            return core.archived_video_download(url,archive,savepath,res,format,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+        return core.video_download(link=url,savepath=savepath,format=format,res=res,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+
+    archived = []
+    def record_result(url,success,message):
+        if message == core.ARCHIVED:
+            archived.append(url)
+        if on_result:
+            on_result(url,success,message)
+
+    #The next few videos are looked up while earlier ones download.
+    def resolve(url):
+        if archive is None or not archive.is_current(video_id(url),format,res):
+            core.warm_metadata(url)
+    urls = prefetch_metadata(prefetch(iter_unique_videos(sources,on_error,counts)),resolve)
+    try:
+        videos_done,failed_videos = core.download_videos_concurrently(urls,download_func,workers=workers,\
+                                                                      on_progress=on_progress,on_result=record_result)
+    finally:
+        urls.close()    #Stops listing if the download ended early.
+        metrics.finish_run(run)
+
+    success,message = core.summarize_run(videos_done,failed_videos,{"already in archive": archived})
+    message += report.summary()
+    dropped = duplicates + counts["repeated"]
+    if dropped:
+        message += f", {dropped} duplicates downloaded once"
+    if counts["unlisted"]:
+        message += f", {counts['unlisted']} playlists/channels could not be listed"
+    if invalid:
+        message += f", {invalid} URLs ignored"
+    return success,message
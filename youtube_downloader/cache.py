@@ -0,0 +1,142 @@
+'''Shared cache for YouTube/Playlist/Channel lookups.
+
+Every entry lives in an in-memory LRU tier. Entries stored with persist=True
+(the plain info dictionaries) are also written to an optional SQLite file so
+that they survive a restart. Each kind of entry has its own time to live, and
+hits and misses are counted so the benefit can be checked.
+'''
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_MAX_ENTRIES = 512
+#Seconds an entry stays valid, by kind. "video" objects hold stream URLs which YouTube expires after a few hours.
+DEFAULT_TTLS = {"video": 3600, "playlist": 900, "channel": 1800}
+
+
+class MetadataCache:
+    '''Two tier (memory LRU + optional SQLite) cache keyed by (kind,id)'''
+
+    def __init__(self,max_entries=DEFAULT_MAX_ENTRIES,ttls=None,path=None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS,**(ttls or {}))
+        self._memory = OrderedDict()    #Maps (kind,key) -> (stored_at,value), least recently used first.
+        self._lock = threading.Lock()
+        self._fetching = {}     #Maps (kind,key) -> Event set once the fetch started by another thread ends.
+        self._db = None
+        self.coalesced = 0  #Lookups that waited for another thread's fetch instead of fetching again.
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.enable_disk(path)
+
+    def enable_disk(self,path):
+        '''Adds the persistent SQLite tier stored at path'''
+        with self._lock:
+            self._db = sqlite3.connect(path,check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS metadata (kind TEXT, key TEXT, value TEXT, stored_at REAL, PRIMARY KEY (kind, key))")
+            self._db.commit()
+
+    def ttl(self,kind):
+        '''Returns the time to live of a kind, "video_info" uses the "video" TTL'''
+        return self.ttls.get(kind,self.ttls.get(kind.split("_")[0],0))
+
+    def get(self,kind,key):
+        '''Returns the cached value or None if it is missing or expired'''
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get((kind,key))
+            if entry and now - entry[0] < self.ttl(kind):
+                self._memory.move_to_end((kind,key))
+                self.hits += 1
+                return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, stored_at FROM metadata WHERE kind = ? AND key = ?",(kind,key)).fetchone()
+                if row and now - row[1] < self.ttl(kind):
+                    value = json.loads(row[0])
+                    self._store(kind,key,value,row[1])     #Promote to the memory tier.
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self,kind,key,value,persist=False):
+        '''Stores a value, also on disk when persist is True and the disk tier is enabled'''
+        now = time.time()
+        with self._lock:
+            self._store(kind,key,value,now)
+            if persist and self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)",(kind,key,json.dumps(value,default=str),now))
+                self._db.commit()
+
+    def get_or_fetch(self,kind,key,fetch,persist=False):
+        '''Returns the cached value, calling fetch() and storing its result on a miss.
+
+        Threads missing the same entry at the same time share one fetch: the first
+        one fetches while the others wait for its result.
+        '''
+        value = self.get(kind,key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            fetching = self._fetching.get((kind,key))
+            if fetching is None:
+                self._fetching[(kind,key)] = threading.Event()
+            else:
+                self.coalesced += 1
+        if fetching is not None:
+            fetching.wait()
+            value = self.get(kind,key)
+            if value is not None:
+                return value
+            return self.get_or_fetch(kind,key,fetch,persist=persist)    #The other fetch failed, try it ourselves.
+
+        try:
+            value = fetch()     #Errors are not cached, the next lookup simply tries again.
+            self.put(kind,key,value,persist=persist)
+        finally:
+            with self._lock:
+                self._fetching.pop((kind,key)).set()
+        return value
+
+    def forget(self,kind,key):
+        '''Drops one entry from both tiers, e.g. a video whose stream URLs stopped working'''
+        with self._lock:
+            self._memory.pop((kind,key),None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM metadata WHERE kind = ? AND key = ?",(kind,key))
+                self._db.commit()
+
+    def _store(self,kind,key,value,stored_at):
+        '''Puts an entry in the memory tier and evicts the least recently used ones (lock held)'''
+        self._memory[(kind,key)] = (stored_at,value)
+        self._memory.move_to_end((kind,key))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        '''Returns the hit/miss counters'''
+        with self._lock:
+            return {"hits": self.hits,"disk_hits": self.disk_hits,"misses": self.misses,"coalesced": self.coalesced,
+                    "evictions": self.evictions,"entries": len(self._memory)}
+
+    def clear(self):
+        '''Empties both tiers'''
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM metadata")
+                self._db.commit()
+
+
+cache = MetadataCache()     #Shared by the GUI, the command line and every download thread.
@@ -0,0 +1,352 @@
+'''Command line entry point: python -m youtube_downloader <command> ...'''
+
+import argparse     #Parses the command line options.
+import json     #Info commands print their fields as JSON.
+import os
+import sys
+import time
+
+from . import batch,core,export,filters,ratelimit,session
+from .metrics import metrics,serve_prometheus
+from .archive import ARCHIVE_NAME,DownloadArchive,default_archive_path
+from .enumeration import CHANNEL_TABS
+from .fields import CHANNEL_FIELDS,PLAYLIST_FIELDS,VIDEO_FIELDS,plan
+from .integrity import verify_files
+from .jobqueue import DEFAULT_JOURNAL,DownloadQueue,kind_of
+
+
+RESOLUTIONS = ["1080p", "720p", "480p", "360p","240p","144p"]  #Same choices as the GUI dropdowns.
+FORMATS = ['mp4', 'webm', 'mp3', 'm4a', 'opus']  #The last three download audio only.
+
+
+def print_progress(fraction):
+    '''Prints the download progress on a single line of stderr'''
+    sys.stderr.write(f"\r{fraction * 100:5.1f}%")
+    sys.stderr.flush()
+
+
+def rate_argument(text):
+    '''argparse type for bandwidth values such as 500K or 2M'''
+    try:
+        return ratelimit.parse_rate(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def field_list(text):
+    '''argparse type for comma separated field names such as title,views'''  #Docstring
+    return [field.strip() for field in text.split(",") if field.strip()]
+
+
+def add_channel_options(command):
+    '''Adds the tab and filter options of channel downloads'''  #Docstring
+    command.add_argument("--tabs",nargs="+",default=["videos"],choices=list(CHANNEL_TABS),help="channel tabs to download (default: videos)")
+    command.add_argument("--after",type=filters.parse_date,metavar="YYYY-MM-DD",help="only videos published on or after this date")
+    command.add_argument("--before",type=filters.parse_date,metavar="YYYY-MM-DD",help="only videos published on or before this date")
+    command.add_argument("--min-minutes",type=float,help="only videos at least this long")
+    command.add_argument("--max-minutes",type=float,help="only videos at most this long")
+    command.add_argument("-k","--keyword",action="append",default=[],help="only videos with this word in the title or tags, repeatable")
+
+
+def channel_filter(args):
+    '''Returns the VideoFilter described by the channel options'''  #Docstring
+    to_seconds = lambda minutes: int(minutes * 60) if minutes else None
+    return filters.VideoFilter(after=args.after,before=args.before,min_length=to_seconds(args.min_minutes),\
+                               max_length=to_seconds(args.max_minutes),keywords=tuple(args.keyword))
+
+
+def build_parser():
+    '''Creates the argument parser with one sub-command per GUI tab'''  #Docstring
+    parser = argparse.ArgumentParser(prog="python -m youtube_downloader",description="Download YouTube videos, playlists and channels or fetch their info without the GUI.")
+    parser.add_argument("--cache-db",metavar="PATH",help="keep looked up info in this SQLite file between runs")
+    parser.add_argument("--http2",action="store_true",help="send YouTube page and API requests over HTTP/2 (needs httpx[http2])")
+    parser.add_argument("--http-stats",action="store_true",help="print how many requests reused a pooled connection when done")
+    parser.add_argument("--limit-rate",type=rate_argument,metavar="RATE",help="cap the total download speed in bytes per second, e.g. 500K or 2M")
+    parser.add_argument("--max-requests",type=float,metavar="N",help="cap YouTube page and API requests per second")
+    parser.add_argument("--metrics-log",metavar="PATH",help="append one JSON line per finished video and playlist/channel/batch run")
+    parser.add_argument("--metrics-port",type=int,metavar="PORT",help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+    parser.add_argument("--timings",action="store_true",help="print where the time went (page, streams, transfer) when done")
+    commands = parser.add_subparsers(dest="command",required=True)
+
+    #Options shared by both download commands.
+    def add_download_options(command,url_help=None):
+        command.add_argument("url",help=url_help)
+        command.add_argument("-o","--output",default=".",help="folder to save into (default: current folder)")
+        command.add_argument("-r","--res",default="720p",choices=RESOLUTIONS)
+        command.add_argument("-f","--format",default="mp4",choices=FORMATS)
+        command.add_argument("-s","--segments",type=int,default=core.DEFAULT_SEGMENTS,help="parallel byte ranges per large file, 1 disables (default: %(default)s)")
+        command.add_argument("--retries",type=int,default=core.DEFAULT_RETRIES,help="extra attempts after a network or server error (default: %(default)s)")
+        command.add_argument("-q","--quiet",action="store_true",help="do not print progress")
+
+    add_download_options(commands.add_parser("video",help="download a single video"))
+
+    #Options shared by the playlist and channel commands.
+    def add_listing_options(command,url_help=None):
+        add_download_options(command,url_help)
+        command.add_argument("-w","--workers",type=int,default=4,help="videos downloaded at the same time (default: 4)")
+        command.add_argument("--sync",action="store_true",help="only download videos missing from the download archive, and record new ones")
+        command.add_argument("--archive",metavar="PATH",help=f"download archive used by --sync (default: OUTPUT/{ARCHIVE_NAME})")
+
+    add_listing_options(commands.add_parser("playlist",help="download every video of a playlist"))
+
+    channel = commands.add_parser("channel",help="download the videos of a channel, optionally filtered")
+    add_listing_options(channel)
+    add_channel_options(channel)
+
+    add_listing_options(commands.add_parser("batch",help="download every video, playlist and channel listed in a file, each video once"),\
+                        url_help="a .txt, .csv or .jsonl file of YouTube URLs")
+
+    bulk = commands.add_parser("export",help="write the info of every video behind many URLs to a JSONL, CSV or Parquet file")
+    bulk.add_argument("urls",nargs="+",help="video, playlist or channel URLs, or .txt/.csv/.jsonl files of them")
+    bulk.add_argument("-o","--output",required=True,help="output file; .jsonl, .csv or .parquet picks the format")
+    bulk.add_argument("--format",choices=export.FORMATS,help="output format (default: from the file extension)")
+    bulk.add_argument("-w","--workers",type=int,default=8,help="videos looked up at the same time (default: 8)")
+    bulk.add_argument("--rate",type=float,help="at most this many lookups per second (default: unlimited)")
+    bulk.add_argument("--fields",type=field_list,help="only look these comma separated fields up, e.g. title,views (default: all)")
+    bulk.add_argument("-q","--quiet",action="store_true",help="do not print one line per video")
+
+    check = commands.add_parser("verify",help="re-check the size and digest of every file recorded in a download folder's archive")
+    check.add_argument("folder",help=f"download folder, or the archive file itself (default name: {ARCHIVE_NAME})")
+    check.add_argument("-w","--workers",type=int,default=os.cpu_count() or 4,help="pieces hashed at the same time (default: %(default)s)")
+    check.add_argument("--repair",action="store_true",help="delete damaged files and forget missing ones, so the next --sync downloads them again")
+    check.add_argument("-q","--quiet",action="store_true",help="only print the summary")
+
+    for name,help_text in (("video-info","print video details"),("playlist-info","print playlist details"),("channel-info","print channel details")):
+        info = commands.add_parser(name,help=help_text)
+        info.add_argument("url")
+        info.add_argument("--fields",type=field_list,help="only fetch these comma separated fields, making just the requests they need (default: all)")
+
+    #The persistent queue shared with the GUI.
+    queue = commands.add_parser("queue",help="add to, list or run the persistent download queue")
+    queue.add_argument("--journal",default=DEFAULT_JOURNAL,help="queue journal file (default: %(default)s)")
+    actions = queue.add_subparsers(dest="action",required=True)
+    add = actions.add_parser("add",help="queue videos, playlists or channels")
+    add.add_argument("urls",nargs="+")
+    add.add_argument("-o","--output",default=".",help="folder to save into (default: current folder)")
+    add.add_argument("-r","--res",default="720p",choices=RESOLUTIONS)
+    add.add_argument("-f","--format",default="mp4",choices=FORMATS)
+    add.add_argument("-p","--priority",type=int,default=0,help="higher runs first (default: 0)")
+    add.add_argument("-w","--workers",type=int,default=4,help="videos of a playlist or channel downloaded at the same time (default: 4)")
+    add.add_argument("--sync",action="store_true",help="playlists and channels only download what the folder's archive lacks")
+    add.add_argument("--job-limit",type=rate_argument,metavar="RATE",help="cap this job's download speed, e.g. 500K (default: only the global limit)")
+    add_channel_options(add)   #Only used by channel URLs.
+    actions.add_parser("list",help="show the jobs in the queue")
+    actions.add_parser("clear",help="remove finished jobs")
+    limit = actions.add_parser("limit",help="change the download speed limit of a job")
+    limit.add_argument("job_id",type=int)
+    limit.add_argument("rate",type=rate_argument,help="bytes per second such as 500K or 2M, 0 for unlimited")
+    run = actions.add_parser("run",help="run queued jobs until the queue is empty")
+    run.add_argument("-j","--max-concurrent",type=int,default=2,help="jobs running at the same time (default: 2)")
+    run.add_argument("--per-host",type=int,default=2,help="jobs running at the same time per host (default: 2)")
+
+    return parser
+
+
+def queue_command(args):
+    '''Runs one of the queue actions and returns the process exit code'''  #Docstring
+    download_queue = DownloadQueue(path=args.journal)
+
+    if args.action == "add":
+        for url in args.urls:
+            if not core.is_youtube_url(url):
+                print(f"Invalid URL provided: {url}",file=sys.stderr)
+                continue
+            options = {"tabs": args.tabs,"filter": filters.to_dict(channel_filter(args)),"sync": args.sync,"bandwidth": args.job_limit}
+            job_id = download_queue.add(kind_of(url),url,os.path.abspath(args.output),args.res,args.format,priority=args.priority,\
+                                        workers=args.workers,options=options)
+            print(f"queued job {job_id}: {url}")
+
+    elif args.action == "list":
+        for job in download_queue.jobs():
+            print(f"{job['id']:>5}  {job['state']:<8} {job['priority']:>3}  {job['kind']:<8} {job['url']}  {job['message']}")
+
+    elif args.action == "clear":
+        download_queue.clear_finished()
+
+    elif args.action == "limit":
+        if download_queue.job(args.job_id) is None:
+            print(f"No job {args.job_id}",file=sys.stderr)
+            return 2
+        download_queue.set_bandwidth(args.job_id,args.rate)
+
+    elif args.action == "run":
+        download_queue.set_limits(max_concurrent=args.max_concurrent,per_host_limit=args.per_host)
+        finished = []
+        def report(job_id):
+            job = download_queue.job(job_id)
+            if job and job["state"] in ("done","failed"):
+                finished.append(job["state"])
+                print(f"{job['state']:<6} job {job_id}: {job['url']}  {job['message']}")
+        download_queue.listeners.append(report)
+        download_queue.start()
+        download_queue.wait()
+        return 1 if "failed" in finished else 0
+
+    return 0
+
+
+def export_command(args):
+    '''Runs the export command and returns the process exit code'''  #Docstring
+    urls = []
+    for source in args.urls:
+        if os.path.isfile(source):  #A file of URLs, as for the batch command.
+            try:
+                urls.extend(batch.read_url_file(source))
+            except (OSError,ValueError) as e:
+                print(f"Cannot read {source}: {e}",file=sys.stderr)
+                return 2
+        else:
+            urls.append(source)
+
+    on_result = None
+    if not args.quiet:
+        on_result = lambda url,ok,msg: print(f"{'OK ' if ok else 'ERR'} {url}: {msg}",file=sys.stderr)
+    try:
+        success,message = export.export_info(urls,args.output,format=args.format,workers=args.workers,rate=args.rate,on_result=on_result,fields=args.fields)
+    except (OSError,RuntimeError) as e:    #Unwritable output, or Parquet without pyarrow.
+        print(e,file=sys.stderr)
+        return 2
+    print(message)
+    return 0 if success else 1
+
+
+def verify_command(args):
+    '''Runs the verify command and returns the process exit code'''  #Docstring
+    path = args.folder if os.path.isfile(args.folder) else default_archive_path(args.folder)
+    if not os.path.isfile(path):
+        print(f"No download archive at {path}",file=sys.stderr)
+        return 2
+    archive = DownloadArchive(path)
+    start = time.perf_counter()
+    counts = {}     #Maps status -> files with it.
+    hashed = 0
+    for entry,status,detail in verify_files(archive.files(),workers=args.workers):
+        counts[status] = counts.get(status,0) + 1
+        if status == "ok":
+            hashed += entry["size"]
+            continue
+        if not args.quiet:
+            print(f"{status.upper():<8} {entry['path']}" + (f": {detail}" if detail else ""))
+        if args.repair and status in ("missing","size","corrupt"):
+            if status != "missing":
+                os.remove(entry["path"])
+            archive.forget(entry["path"])
+    seconds = time.perf_counter() - start
+    summary = ", ".join(f"{count} {status}" for status,count in sorted(counts.items())) or "nothing recorded"
+    print(f"Verified {sum(counts.values())} files ({hashed / 2 ** 20:.1f} MiB) in {seconds:.2f}s: {summary}")
+    return 0 if set(counts) <= {"ok"} else 1
+
+
+def print_timings():
+    '''Prints the phase timings and throughput of the videos downloaded so far to stderr'''  #Docstring
+    snapshot = metrics.snapshot()
+    videos = snapshot["videos"]
+    print(f"{videos['ok']} videos downloaded, {videos['failed']} failed, {snapshot['bytes'] / 2 ** 20:.1f} MiB, {snapshot['retries']} retries",file=sys.stderr)
+    for name,summary in snapshot["phases"].items():
+        if summary["count"]:
+            print(f"  {name:<9} avg {summary['avg']:7.3f}s  max {summary['max']:7.3f}s  total {summary['sum']:8.2f}s",file=sys.stderr)
+    transfer = snapshot["phases"]["transfer"]["sum"]
+    if transfer:
+        print(f"  {snapshot['bytes'] / transfer / 2 ** 20:.2f} MiB/s per video while transferring",file=sys.stderr)
+
+
+def main(argv=None):
+    '''Runs one command and returns the process exit code'''  #Docstring
+    args = build_parser().parse_args(argv)
+    if args.cache_db:
+        core.cache.enable_disk(args.cache_db)
+    ratelimit.set_limits(bandwidth_limit=args.limit_rate,request_limit=args.max_requests)
+    if args.metrics_log:
+        metrics.enable_json_log(args.metrics_log)
+    if args.metrics_port:
+        serve_prometheus(args.metrics_port)
+    if args.http2:
+        try:
+            session.install(http2=True)
+        except RuntimeError as e:
+            print(e,file=sys.stderr)
+            return 2
+    try:
+        return run_command(args)
+    finally:
+        if args.http_stats:
+            stats = session.connection_stats()
+            print(f"{stats['requests']} requests over {stats['connections_opened']} connections ({stats['reused']} reused)",file=sys.stderr)
+        if args.timings:
+            print_timings()
+
+
+def run_command(args):
+    '''Runs the parsed command and returns the process exit code'''  #Docstring
+
+    if args.command == "queue":
+        return queue_command(args)
+
+    if args.command == "export":
+        return export_command(args)
+
+    if args.command == "verify":
+        return verify_command(args)
+
+    if args.command != "batch" and not core.is_youtube_url(args.url):  #Same check as the GUI before any network call.
+        print("Invalid URL provided",file=sys.stderr)
+        return 2
+
+    archive = None
+    if getattr(args,"sync",False):
+        archive = DownloadArchive(args.archive or default_archive_path(args.output))
+    report = core.RetryReport()     #Retries of every video of the command, listed at the end.
+
+    if args.command == "video":
+        progress_callback = None
+        if not args.quiet:
+            progress_callback = lambda done,total: print_progress(done / total if total else 0.0)
+        success,message = core.video_download(link=args.url,savepath=args.output,res=args.res,format=args.format,progress_callback=progress_callback,segments=args.segments,\
+                                              retries=args.retries,report=report)
+
+    elif args.command == "playlist":
+        on_result = lambda url,ok,msg: print(f"\n{'OK ' if ok else 'ERR'} {url}: {msg}",file=sys.stderr)
+        success,message = core.playlist_download(link=args.url,res=args.res,format=args.format,path=args.output,workers=args.workers,\
+                                                 on_progress=None if args.quiet else print_progress,on_result=None if args.quiet else on_result,segments=args.segments,archive=archive,\
+                                                 retries=args.retries,report=report)
+
+    elif args.command == "channel":
+        on_result = lambda url,ok,msg: print(f"\n{'OK ' if ok else 'ERR'} {url}: {msg}",file=sys.stderr)
+        success,message = core.channel_download(link=args.url,res=args.res,format=args.format,path=args.output,workers=args.workers,\
+                                                tabs=args.tabs,video_filter=channel_filter(args),\
+                                                on_progress=None if args.quiet else print_progress,on_result=None if args.quiet else on_result,segments=args.segments,archive=archive,\
+                                                retries=args.retries,report=report)
+
+    elif args.command == "batch":
+        try:
+            urls = list(batch.read_url_file(args.url))
+        except (OSError,ValueError) as e:
+            print(f"Cannot read {args.url}: {e}",file=sys.stderr)
+            return 2
+        on_result = lambda url,ok,msg: print(f"\n{'OK ' if ok else 'ERR'} {url}: {msg}",file=sys.stderr)
+        success,message = batch.batch_download(urls,args.output,args.res,args.format,workers=args.workers,\
+                                               on_progress=None if args.quiet else print_progress,on_result=None if args.quiet else on_result,segments=args.segments,archive=archive,\
+                                               retries=args.retries,report=report)
+
+    else:   #One of the info commands.
+        fetch = {"video-info": core.fetch_video_info,"playlist-info": core.fetch_playlist_info,"channel-info": core.fetch_channel_info}[args.command]
+        table = {"video-info": VIDEO_FIELDS,"playlist-info": PLAYLIST_FIELDS,"channel-info": CHANNEL_FIELDS}[args.command]
+        try:
+            plan(args.fields or [],table)
+        except ValueError as e:
+            print(e,file=sys.stderr)
+            return 2
+        try:
+            info = fetch(args.url,args.fields)
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}",file=sys.stderr)
+            return 1
+        print(json.dumps(info,indent=2,default=str,ensure_ascii=False))     #default=str handles dates.
+        return 0
+
+    if not args.quiet:
+        sys.stderr.write("\n")
+        for url in report.exhausted:    #Still failing with network or server errors after every retry.
+            print(f"gave up after {args.retries + 1} attempts: {url}",file=sys.stderr)
+    print(message)
+    return 0 if success else 1
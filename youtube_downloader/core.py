@@ -0,0 +1,558 @@
+'''Headless download and metadata core shared by the GUI and the command line.
+
+Nothing in this module touches Tk, so it can be imported and driven on a server
+without a display. Downloads return a (success,message) tuple just like the GUI
+always did, while the info functions return a plain dictionary of fields.
+'''
+
+import os
+import threading
+import time    # module that allows us to concurrently run multiple tasks.
+from concurrent.futures import FIRST_COMPLETED,ThreadPoolExecutor,wait  #Bounded pool of worker threads for parallel playlist downloads.
+from pytubefix import YouTube   #Contains all the functions,attributes for video download and info.
+from pytubefix import Playlist  #Contains all functions,attributes and methods for playlist download and info.
+from pytubefix import Channel  #Contains all functions,attributes and methods for channel download and info.
+from pytubefix.exceptions import RegexMatchError    #error encountered in URL expression matching.
+from pytubefix.exceptions import AgeRestrictedError,VideoUnavailable   #other possible errors.
+from .cache import cache
+from . import filters,session
+from .metrics import metrics
+from .ratelimit import throttle
+from .retry import DEFAULT_RETRIES,RetryReport,backoff_delay,classify
+from .fields import CHANNEL_FIELDS,PLAYLIST_FIELDS,VIDEO_FIELDS,fetch_info,read_fields
+from .archive import folder_manifest
+from .integrity import InlineHasher,check_size,file_digest
+from .enumeration import expected_length,iter_channel_urls,iter_video_urls,prefetch,prefetch_metadata
+from .ffmpeg import AUDIO_FORMATS,convert_audio_stream,ffmpeg_path,mux
+from .resume import PartialDownload,is_complete
+from .segmented import DEFAULT_SEGMENTS,RangeNotSupported,segmented_download,stream_chunks
+from .streams import best_audio,parse_number,select_streams
+from .urls import channel_key,playlist_id,video_id
+
+
+#Every pytubefix request (pages, API calls, sizes) reuses the keep-alive connections of the download pool.
+session.install()
+
+SEGMENTED_MIN_SIZE = 4 * 1024 * 1024    #Smaller streams are not worth splitting into ranges.
+ARCHIVED = "Already in archive"     #Message of videos a sync run skipped.
+OLD_IN_A_ROW = 3    #Videos in a row older than the "after" date that end a channel's videos tab.
+
+
+def is_youtube_url(url):
+    '''Checks if the URL follows the YouTube format or not'''  #Docstring
+    return bool(url) and ("youtube.com" in url or "youtu.be" in url)
+
+
+'''********************************CACHED OBJECTS******************************************'''
+# Building a YouTube/Playlist/Channel object fetches and parses its page, so the objects are
+# shared through the metadata cache. An info lookup followed by a download of the same URL
+# only pays for the page once.
+
+def get_youtube(url):
+    '''Returns the (cached) YouTube object of a video URL'''  #Docstring
+    return cache.get_or_fetch("video",video_id(url) or url,lambda: YouTube(url))
+
+
+def get_playlist(url):
+    '''Returns the (cached) Playlist object of a playlist URL'''  #Docstring
+    return cache.get_or_fetch("playlist",playlist_id(url) or url,lambda: Playlist(url))
+
+
+def get_channel(url):
+    '''Returns the (cached) Channel object of a channel URL'''  #Docstring
+    return cache.get_or_fetch("channel",channel_key(url) or url,lambda: Channel(url))
+
+
+'''********************************DOWNLOADS***********************************************'''
+
+def download_stream(stream,savepath,segments=DEFAULT_SEGMENTS,progress_callback=None,filename=None,limiter=None,record=True):
+    '''Downloads the stream into savepath, resumably and in parallel byte ranges when it is large enough.
+
+    The file is hashed while it is written and must end up exactly stream.filesize
+    bytes long; unless record is False its digest goes to the folder's manifest.
+    '''  #Docstring
+
+    total_size = stream.filesize
+    if total_size >= SEGMENTED_MIN_SIZE:
+        segments = max(1,segments)
+    else:
+        segments = 1    #Small streams are fetched as a single (still resumable) range.
+
+    file_path = os.path.join(savepath,filename or stream.default_filename)
+    if is_complete(file_path,total_size):   #e.g. the audio half of a mux that was interrupted afterwards.
+        return file_path
+    hasher = InlineHasher(total_size)
+    try:
+        file_path = segmented_download(stream.url,file_path,total_size,segments=segments,progress_callback=progress_callback,key=f"itag={stream.itag}",\
+                                       limiter=limiter,hasher=hasher)
+        check_size(file_path,total_size)
+        digest = hasher.digest(file_path)
+    except RangeNotSupported:
+        #Fall back to the single sequential connection of pytubefix, progress and throttling come from the YouTube on_progress_callback.
+        PartialDownload(file_path,total_size).discard()
+        file_path = stream.download(output_path=savepath,filename=filename)
+        check_size(file_path,total_size)    #pytubefix stops quietly when a connection drops.
+        digest = file_digest(file_path)     #pytubefix wrote it, so it is hashed once afterwards.
+    if record:
+        folder_manifest(savepath).record_file(file_path,digest)
+    return file_path
+
+
+def download_and_mux(selection,savepath,format,segments=DEFAULT_SEGMENTS,progress_callback=None,limiter=None):
+    '''Downloads the video-only and audio-only streams in parallel and joins them into one file'''  #Docstring
+
+    base = os.path.splitext(selection.video.default_filename)[0]
+    output_path = os.path.join(savepath,f"{base}.{format}")
+    parts = {"video": selection.video,"audio": selection.audio}
+    total_size = selection.video.filesize + selection.audio.filesize
+    lock = threading.Lock()
+    done = {"video": 0,"audio": 0}  #Bytes downloaded of each stream, reported together as one file.
+
+    def download_part(name):
+        def part_progress(bytes_downloaded,part_total):
+            with lock:
+                done[name] = bytes_downloaded
+                if progress_callback:
+                    progress_callback(done["video"] + done["audio"],total_size)
+        stream = parts[name]
+        filename = f"{base}.{name}.{stream.subtype}"     #e.g. "title.video.webm" and "title.audio.webm" never clash.
+        return download_stream(stream,savepath,segments=segments,progress_callback=part_progress,filename=filename,limiter=limiter,record=False)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        video_future = pool.submit(download_part,"video")
+        audio_future = pool.submit(download_part,"audio")
+        video_path,audio_path = video_future.result(),audio_future.result()
+
+    mux(video_path,audio_path,output_path,container=format)
+    for leftover in (video_path,audio_path):    #The separate streams are not needed once joined.
+        os.remove(leftover)
+    folder_manifest(savepath).record_file(output_path,file_digest(output_path))    #ffmpeg wrote it, so it is hashed once, while still cached.
+    return output_path
+
+
+def audio_download(yt,savepath,format,progress_callback=None,segments=DEFAULT_SEGMENTS,on_file=None,limiter=None):
+    '''Downloads only the audio of a video and converts it to mp3/m4a/opus while the bytes arrive'''  #Docstring
+
+    on_file = on_file or (lambda path,itag: None)
+    audio = best_audio(yt.streams,format)   #Audio-only stream, so no video bytes are wasted.
+    if not audio:
+        return False,"No audio stream availaible"
+
+    if not ffmpeg_path():   #Without ffmpeg keep the audio in the container YouTube serves it in.
+        path = download_stream(audio,savepath,segments=segments,progress_callback=progress_callback,limiter=limiter)
+        on_file(path,str(audio.itag))
+        return True,f"Download Complete (ffmpeg not found, saved as {os.path.splitext(path)[1]}): {yt.title}"
+
+    output_path = os.path.join(savepath,f"{os.path.splitext(audio.default_filename)[0]}.{format}")
+    if os.path.isfile(output_path):     #Converted files only get their final name once complete.
+        on_file(output_path,str(audio.itag))
+        return True,f"Already downloaded: {yt.title}"
+
+    def counted(chunks):
+        '''Passes the chunks on to ffmpeg while reporting progress'''
+        bytes_downloaded = 0
+        for chunk in chunks:
+            yield chunk
+            bytes_downloaded += len(chunk)
+            if progress_callback:
+                progress_callback(bytes_downloaded,audio.filesize)
+
+    convert_audio_stream(counted(stream_chunks(audio.url,audio.filesize,limiter=limiter)),output_path,format,audio.subtype)
+    folder_manifest(savepath).record_file(output_path,file_digest(output_path))    #ffmpeg wrote it, so it is hashed once, while still cached.
+    on_file(output_path,str(audio.itag))
+    return True,f"Download Complete: {yt.title}"
+
+
+def download_video_once(link,savepath,res,format,progress_callback=None,segments=DEFAULT_SEGMENTS,on_file=None,limiter=None,stats=None):
+    '''One attempt of video_download, raising whatever went wrong; stats (a metrics.VideoStats) gets the phase timings'''  #Docstring
+
+    #on_file(path,itag) is told where the finished file is and which stream(s) it came from,
+    #also when it was already on disk. Muxed files report both itags as "137+140".
+    #limiter is an optional ratelimit.TokenBucket of bytes per second for this download (or a whole job),
+    #applied on top of the global ratelimit.bandwidth limit.
+    on_file = on_file or (lambda path,itag: None)
+    stats = stats or metrics.start_video(link)
+
+    #Get the (possibly cached) YouTube object to access YouTube class methods
+    with stats.phase("page"):
+        yt = get_youtube(link)
+        getattr(yt,"watch_html",None)   #pytubefix fetches the watch page lazily, time it here rather than inside "streams".
+
+    #Report progress through progress_callback(bytes_downloaded,total_bytes) if given. The object may be
+    #shared through the cache, so always replace whatever callback an earlier download registered.
+    #pytubefix's own sequential download (the fallback) is throttled from the same callback.
+    def on_progress(stream,chunk,bytes_remaining):
+        throttle(len(chunk),limiter)
+        metrics.count_bytes(len(chunk))
+        if progress_callback:
+            progress_callback(stream.filesize - bytes_remaining,stream.filesize)
+    yt.register_on_progress_callback(on_progress)
+
+    with stats.phase("streams"):
+        streams = yt.streams    #Resolves the stream manifest (player API call, signature deciphering).
+
+    if format in AUDIO_FORMATS:     #Audio formats ignore the resolution.
+        with stats.phase("transfer"):
+            return audio_download(yt,savepath,format,progress_callback=progress_callback,segments=segments,on_file=on_file,limiter=limiter)
+
+    # Rank all the streams availaible for the video against the requested resolution and format.
+    selection = select_streams(streams,res,format,allow_mux=ffmpeg_path() is not None)
+    if not selection:  #If no matching stream was found.
+        return False,f"No stream availaible with resolution :{res}"  #Returns False and a fail message.
+
+    #Mention it when the fallback policy had to pick another resolution.
+    chosen = selection.video.resolution
+    note = f" ({chosen})" if parse_number(chosen) != parse_number(res) else ""
+
+    if selection.audio is None:     #A progressive stream already has video and sound in one file.
+        itag = str(selection.video.itag)
+        file_path = os.path.join(savepath,selection.video.default_filename)
+        if is_complete(file_path,selection.video.filesize):
+            on_file(file_path,itag)
+            return True,f"Already downloaded: {yt.title}"     #Skip files that are already complete on disk.
+        with stats.phase("transfer"):
+            file_path = download_stream(selection.video,savepath,segments=segments,progress_callback=progress_callback,limiter=limiter) #Downloads the selected stream to the specified savepath.
+    else:
+        itag = f"{selection.video.itag}+{selection.audio.itag}"
+        base = os.path.splitext(selection.video.default_filename)[0]
+        file_path = os.path.join(savepath,f"{base}.{format}")
+        if os.path.isfile(file_path):  #Muxed files only get their final name once complete.
+            on_file(file_path,itag)
+            return True,f"Already downloaded: {yt.title}"
+        with stats.phase("transfer"):
+            file_path = download_and_mux(selection,savepath,format,segments=segments,progress_callback=progress_callback,limiter=limiter)
+    on_file(file_path,itag)
+
+    return True,f"Download Complete{note}: {yt.title}"  #Returns True and a success message.
+
+
+def error_message(error):
+    '''Returns the message a failed download reports for an exception'''  #Docstring
+    if isinstance(error,RegexMatchError):
+        return "Invalid URL provided"
+    if isinstance(error,AgeRestrictedError):
+        return "This video is Age Restricted and cannot be downloaded"
+    if isinstance(error,VideoUnavailable):
+        return "This video is unavailaible"
+    return f"{error}"   #An error message with exception details.
+
+
+def video_download(link,savepath,res,format,progress_callback=None,segments=DEFAULT_SEGMENTS,on_file=None,limiter=None,retries=DEFAULT_RETRIES,report=None,run=None):
+    '''Contains actual logic to download YouTube video with given resolution and format''' #Docstring
+
+    #Retryable errors (connection resets, timeouts, HTTP 429/5xx, expired stream URLs) are tried again up to
+    #`retries` times after a jittered backoff; the .part files keep what was written, so the retry resumes.
+    #Terminal errors (invalid URL, age restricted, unavailable...) fail at once. report, a retry.RetryReport,
+    #collects the retries of a whole playlist or channel.
+    #Phase timings, bytes and retries go to metrics.metrics, and add up into run (a metrics.RunStats) if given.
+    stats = metrics.start_video(link,run)
+    reported = 0    #Highest byte count reported so far; a resumed retry does not count its bytes twice.
+
+    def tracked_progress(bytes_downloaded,total_bytes):
+        nonlocal reported
+        if bytes_downloaded > reported:
+            stats.bytes += bytes_downloaded - reported
+            reported = bytes_downloaded
+        if progress_callback:
+            progress_callback(bytes_downloaded,total_bytes)
+
+    for attempt in range(retries + 1):
+        #Create a try block to handle potential errors.
+        try:
+            success,message = download_video_once(link,savepath,res,format,progress_callback=tracked_progress,\
+                                                  segments=segments,on_file=on_file,limiter=limiter,stats=stats)
+            if report is not None:
+                report.finished(link,attempt + 1)
+            metrics.finish_video(stats,success,message)
+            return success,message
+        except Exception as e:  # Catch any exceptions if raised during download process in variable e
+            if attempt < retries and classify(e) == "retryable":
+                stats.retries += 1
+                if report is not None:
+                    report.retried(link,e)
+                cache.forget("video",video_id(link) or link)    #The next attempt looks the streams up again, with fresh URLs.
+                time.sleep(backoff_delay(attempt))
+                continue
+            if report is not None:
+                report.finished(link,attempt + 1,e)
+            note = f" (gave up after {attempt + 1} attempts)" if attempt else ""
+            metrics.finish_video(stats,False,error_message(e) + note)
+            return False,error_message(e) + note  #Returns False and an error message.
+
+
+def download_videos_concurrently(urls,download_func,workers=4,on_progress=None,on_result=None,total=None):
+    '''Downloads the given video URLs on a bounded pool of worker threads.
+
+    urls may be any iterable, including a lazy generator: a URL is only taken from it
+    when a worker is about to need it, so the first downloads start before the whole
+    playlist is known and memory stays bounded. total is the expected number of videos
+    used for the aggregate progress, or None to use the number of URLs seen so far.
+    '''  #Docstring
+
+    # download_func(url,progress_callback) must return a (success,message) tuple just like video_download,
+    # so the playlist can be driven by video_download or by a local stand-in for the YouTube backend.
+    workers = max(1,int(workers))
+    urls = iter(urls)   #Pulled one by one, the caller's list is never touched by the workers.
+
+    lock = threading.Lock()     #Guards the counters below since every worker updates them.
+    fractions = {}      #Maps position in playlist -> fraction downloaded (0.0 to 1.0) of the videos not finished yet.
+    fraction_total = 0.0    #Running sum of fractions, so a chunk never has to re-add the whole playlist.
+    videos_seen = 0
+    videos_downloaded = 0
+    failed_videos = []
+
+    def set_fraction(index,fraction):
+        '''Updates one video's share and sends the aggregate progress of the whole run to on_progress (lock held)'''
+        nonlocal fraction_total
+        fraction_total += fraction - fractions.get(index,0.0)
+        fractions[index] = fraction
+        if on_progress:
+            on_progress(min(1.0,fraction_total / max(total or 0,videos_seen)))
+
+    def download_one(index,url):
+        '''Downloads one video and keeps its share of the aggregate progress up to date'''
+        def progress_callback(bytes_downloaded,total_bytes):
+            with lock:
+                set_fraction(index,bytes_downloaded / total_bytes if total_bytes else 0.0)
+        return download_func(url,progress_callback)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}    #Maps future -> (index,url), never more than 2 URLs per worker.
+
+        def submit_next():
+            '''Takes the next URL and queues its download, returns False once there are none left'''
+            nonlocal videos_seen
+            url = next(urls,None)
+            if url is None:
+                return False
+            with lock:
+                index = videos_seen
+                videos_seen += 1
+            futures[pool.submit(download_one,index,url)] = (index,url)
+            return True
+
+        while len(futures) < 2 * workers and submit_next():    #One waiting URL per worker keeps every worker busy.
+            pass
+
+        while futures:
+            finished,_ = wait(futures,return_when=FIRST_COMPLETED)     #Handle each video as soon as it finishes, in whatever order.
+            for future in finished:
+                index,url = futures.pop(future)
+                try:
+                    success,message = future.result()
+                except Exception as e:  #download_func should not raise, but a crashed worker must still be counted.
+                    success,message = False,f"{e}"
+
+                with lock:
+                    set_fraction(index,1.0)  #A finished video (downloaded or failed) counts fully towards progress.
+                    del fractions[index]    #Its 1.0 stays in fraction_total, the entry itself is no longer needed.
+                    if success:
+                        videos_downloaded += 1
+                    else:
+                        failed_videos.append(url)
+
+                if on_result:
+                    on_result(url,success,message)
+                submit_next()
+
+    return videos_downloaded,failed_videos
+
+
+def warm_metadata(url,video_filter=None):
+    '''Looks a video and its streams up ahead of its download, filling the cache video_download reads.
+
+    With a video_filter only the fields the filter reads are fetched first, and
+    the streams only if the video passes, so dropped videos never pay for them.
+    '''  #Docstring
+    yt = get_youtube(url)
+    if not filters.is_empty(video_filter):
+        read_fields(yt,filters.needed_fields(video_filter),VIDEO_FIELDS)
+        if filters.check(yt,video_filter):
+            return
+    yt.streams   #Fetches the player response with the stream manifest and deciphers it.
+
+
+def archived_video_download(link,archive,savepath,res,format,progress_callback=None,segments=DEFAULT_SEGMENTS,limiter=None,retries=DEFAULT_RETRIES,report=None,run=None):
+    '''video_download for sync runs: skips videos the archive still has and records the new ones'''  #Docstring
+    vid = video_id(link)
+    if archive.is_current(vid,format,res):   #A database lookup, YouTube is not asked anything.
+        return True,ARCHIVED
+    on_file = lambda file_path,itag: archive.add(vid or link,format,res,itag,file_path)
+    return video_download(link=link,savepath=savepath,format=format,res=res,progress_callback=progress_callback,segments=segments,on_file=on_file,limiter=limiter,\
+                          retries=retries,report=report,run=run)
+
+
+def summarize_run(videos_done,failed_videos,skipped):
+    '''Builds the (success,message) of a playlist or channel run.
+
+    skipped maps a note such as "already in archive" to the URLs it covers; they
+    finished successfully but were not downloaded.
+    '''  #Docstring
+    skipped_count = sum(len(urls) for urls in skipped.values())
+    videos_downloaded = videos_done - skipped_count
+    total_videos = videos_downloaded + len(failed_videos)   #Videos that had to be downloaded.
+    notes = "".join(f", {len(urls)} {note}" for note,urls in skipped.items() if urls)
+
+    #Check if all videos were successfully downloaded.
+    if total_videos == 0:   #Nothing had to be downloaded.
+        return (True,f"Nothing new to download{notes}") if skipped_count else (False,"No videos found")
+    elif videos_downloaded == 0:  #If no videos downloaded.
+        return False,f"No videos downloaded{notes}"
+    elif videos_downloaded == total_videos:     #If all videos downloaded.
+        return True,f"All videos downloaded successfully{notes}"
+    else:     #If few videos not downloaded.
+        return True,f"{videos_downloaded} of {total_videos} downloaded successfully{notes}"
+
+
+def playlist_download(link,res,format,path,workers=4,on_progress=None,on_result=None,segments=DEFAULT_SEGMENTS,archive=None,limiter=None,retries=DEFAULT_RETRIES,report=None):
+    '''Handles the playlist download logic, syncing against archive (a DownloadArchive) when given'''   #Docstring
+
+    report = report if report is not None else RetryReport()   #Retries of every video, summed up at the end.
+    run = metrics.start_run("playlist",link)    #Timings and bytes of every video, logged when the run ends.
+
+    #Create a try block to handle potential errors.
+    try:
+        #Get the (possibly cached) Playlist object to access Playlist Class methods.
+        pt = get_playlist(link)
+
+        archived = []   #URLs the archive already has.
+
+        #Walk the playlist page by page in the background instead of listing every video first,
+        #so the first downloads start right away and only a small window of URLs is in memory.
+        #The next few videos are looked up while earlier ones download, so no worker waits for a watch page.
+        def resolve(url):
+            if archive is None or not archive.is_current(video_id(url),format,res):
+                warm_metadata(url)
+        urls = prefetch_metadata(prefetch(iter_video_urls(pt)),resolve)
+
+        #Each worker downloads one video at a time through the common video_download function.
+        def download_func(url,progress_callback):
+            if archive is None:
+                return video_download(link=url,savepath=path,format=format,res=res,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+            success,message = archived_video_download(url,archive,path,res,format,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+            if message == ARCHIVED:
+                archived.append(url)
+            return success,message
+
+        #Download several videos of the playlist at once.
+        try:
+            videos_done,failed_videos = download_videos_concurrently(urls,download_func,workers=workers,total=expected_length(pt),\
+                                                                     on_progress=on_progress,on_result=on_result)
+        finally:
+            urls.close()    #Stops fetching pages if the download ended early.
+        success,message = summarize_run(videos_done,failed_videos,{"already in archive": archived})
+        return success,message + report.summary()
+
+    except RegexMatchError:
+        return False,"Invalid URL provided"
+    except KeyError:
+        return False,"YouTube structure may have changed"
+    except Exception as e:  #Catch any exceptions if raised in creating playlist object.
+        return False,f"{e}" #Return False and exception raised.
+    finally:
+        metrics.finish_run(run)
+
+
+def channel_download(link,res,format,path,tabs=("videos",),video_filter=None,workers=4,on_progress=None,on_result=None,segments=DEFAULT_SEGMENTS,archive=None,limiter=None,\
+                     retries=DEFAULT_RETRIES,report=None):
+    '''Downloads the videos of a channel's tabs that pass video_filter, syncing against archive when given'''   #Docstring
+
+    report = report if report is not None else RetryReport()   #Retries of every video, summed up at the end.
+    run = metrics.start_run("channel",link)     #Timings and bytes of every video, logged when the run ends.
+
+    #Create a try block to handle potential errors.
+    try:
+        #A fresh Channel object: walking its tabs switches the page it reads, which must not
+        #disturb the cached object an info lookup of the same channel may be reading.
+        ct = Channel(link)
+
+        #Walk the tabs page by page in the background, remembering which tab each URL came from and where.
+        finished_tabs = set()   #Tabs not worth walking any further.
+        tab_of = {}     #Maps URL -> (tab,position in the listing), for the URLs handed out and not downloaded yet.
+        def tab_urls():
+            for position,(tab,url) in enumerate(iter_channel_urls(ct,tabs,finished_tabs)):
+                tab_of[url] = (tab,position)
+                yield url
+        skipped = []    #URLs dropped by the filter, they count as done but not as downloaded.
+        archived = []   #URLs the archive already has.
+        too_old = set()     #Positions of the videos tab's videos found older than "after".
+
+        def found_too_old(tab,position):
+            '''Ends the videos tab once OLD_IN_A_ROW videos in a row are older than "after"'''
+            #Only the videos tab is newest first; shorts, live streams and premieres can be out of order, and so
+            #can a single video, hence several in a row. Workers finish in any order, so runs are found by position.
+            if tab != "videos":
+                return
+            too_old.add(position)
+            for first in range(position - OLD_IN_A_ROW + 1,position + 1):
+                if all(other in too_old for other in range(first,first + OLD_IN_A_ROW)):
+                    finished_tabs.add(tab)
+                    return
+
+        #The next few videos are looked up while earlier ones download: the filter's fields first, the streams only for videos that pass.
+        def resolve(url):
+            tab,position = tab_of.get(url,(None,None))
+            if tab not in finished_tabs and (archive is None or not archive.is_current(video_id(url),format,res)):
+                warm_metadata(url,video_filter)
+        urls = prefetch_metadata(prefetch(tab_urls()),resolve)
+
+        #Each worker checks the archive and the filter on the video's metadata first, then downloads it through video_download.
+        def download_func(url,progress_callback):
+            tab,position = tab_of.pop(url,(None,None))
+            if tab in finished_tabs:    #Fetched ahead before the tab was found to be too old, skip it without a lookup.
+                skipped.append(url)
+                return True,"Skipped: older than the filter allows"
+            if archive is not None and archive.is_current(video_id(url),format,res):
+                archived.append(url)
+                return True,ARCHIVED
+            if not filters.is_empty(video_filter):
+                yt = get_youtube(url)   #Cached, so a video that passes does not fetch its page twice.
+                reason = filters.check(yt,video_filter)
+                if reason:
+                    published = filters.published_date(yt)
+                    if video_filter.after and published and published < video_filter.after:
+                        found_too_old(tab,position)
+                    skipped.append(url)
+                    return True,f"Skipped: {reason}"
+            if archive is not None:
+                return archived_video_download(url,archive,path,res,format,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+            return video_download(link=url,savepath=path,format=format,res=res,progress_callback=progress_callback,segments=segments,limiter=limiter,retries=retries,report=report,run=run)
+
+        #Download several videos of the channel at once.
+        try:
+            videos_done,failed_videos = download_videos_concurrently(urls,download_func,workers=workers,\
+                                                                     on_progress=on_progress,on_result=on_result)
+        finally:
+            urls.close()    #Stops fetching pages if the download ended early.
+        success,message = summarize_run(videos_done,failed_videos,{"already in archive": archived,"skipped by the filters": skipped})
+        return success,message + report.summary()
+
+    except RegexMatchError:
+        return False,"Invalid URL provided"
+    except KeyError:
+        return False,"YouTube structure may have changed"
+    except Exception as e:  #Catch any exceptions if raised in creating channel object.
+        return False,f"{e}" #Return False and exception raised.
+    finally:
+        metrics.finish_run(run)
+
+
+'''********************************METADATA***********************************************'''
+# The info functions let pytubefix errors (RegexMatchError, VideoUnavailable...) propagate
+# so every caller can report them in its own way. fields limits the lookup to some of the
+# keys (see fields.py): only the requests those keys need are made.
+
+def fetch_video_info(url,fields=None):
+    '''Fetches the YouTube video details as a dictionary'''  #Docstring
+    #Shares the YouTube object with a later download of the same video.
+    return fetch_info("video_info",video_id(url) or url,lambda: get_youtube(url),VIDEO_FIELDS,fields)
+
+
+def fetch_playlist_info(url,fields=None):
+    '''Fetches the YouTube Playlist details as a dictionary'''  #Docstring
+    return fetch_info("playlist_info",playlist_id(url) or url,lambda: get_playlist(url),PLAYLIST_FIELDS,fields)
+
+
+def fetch_channel_info(url,fields=None):
+    '''Fetches the YouTube channel details as a dictionary'''  #Docstring
+    return fetch_info("channel_info",channel_key(url) or url,lambda: get_channel(url),CHANNEL_FIELDS,fields)
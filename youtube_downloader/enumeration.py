@@ -0,0 +1,137 @@
+'''Lazy, paginated enumeration of playlist and channel videos.
+
+pytubefix fetches the videos of a playlist or channel one continuation page
+(about 100 videos) at a time, but Playlist.video_urls and len(playlist) pull
+every page before returning. The helpers here hand out URLs as soon as the
+first page is parsed and fetch later pages on a background thread, holding at
+most a fixed window of URLs in memory whatever the size of the playlist.
+'''
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_WINDOW = 64     #URLs fetched ahead of the downloads at most.
+DEFAULT_METADATA_AHEAD = 8  #Videos whose details are looked up ahead of the downloads.
+CHANNEL_TABS = {"videos": "videos_url","shorts": "shorts_url","live": "live_url"}  #Channel tab -> attribute holding its URL.
+
+_DONE = object()    #Marks the end of the enumeration in the prefetch queue.
+
+
+def iter_video_urls(source):
+    '''Yields the video URLs of a Playlist or Channel page by page'''  #Docstring
+    generator = getattr(source,"url_generator",None)
+    if generator is not None:
+        return generator()      #Does not keep the URLs around, unlike the cached video_urls list.
+    return iter(source.video_urls)
+
+
+def iter_channel_urls(channel,tabs=("videos",),finished_tabs=None):
+    '''Yields (tab,url) for the videos of a Channel's "videos", "shorts" and "live" tabs, newest first.
+
+    A tab is left as soon as its name is added to finished_tabs, which lets a
+    date filter stop walking pages once it reaches videos that are too old.
+    '''
+    finished_tabs = finished_tabs if finished_tabs is not None else set()
+    for tab in tabs:
+        channel.html_url = getattr(channel,CHANNEL_TABS[tab])  #Switches the page the next url_generator() walks.
+        for url in channel.url_generator():
+            if tab in finished_tabs:
+                break
+            yield tab,url
+
+
+def expected_length(source):
+    '''Returns the video count a Playlist or Channel advertises without enumerating it, or None'''  #Docstring
+    try:
+        length = source.length  #Read from the first page, it never walks the continuation pages.
+    except Exception:
+        return None
+    return length if isinstance(length,int) and length > 0 else None
+
+
+def prefetch(iterable,window=DEFAULT_WINDOW):
+    '''Iterates over iterable on a background thread, staying at most window items ahead of the caller.
+
+    Errors raised by the iterable are raised again in the caller once the
+    items before them have been consumed. Closing the returned generator stops
+    the background thread after its current item.
+    '''
+    items = queue.Queue(maxsize=max(1,int(window)))
+    stopped = threading.Event()
+
+    def put(item):
+        '''Waits for room in the window, giving up once the consumer is gone'''
+        while not stopped.is_set():
+            try:
+                items.put(item,timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item,None)):
+                    return
+            put((_DONE,None))
+        except Exception as e:
+            put((_DONE,e))
+
+    threading.Thread(target=produce,name="url-prefetch",daemon=True).start()
+
+    def consume():
+        try:
+            while True:
+                item,error = items.get()
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()   #Also reached when the caller stops early.
+
+    return consume()
+
+
+def prefetch_metadata(urls,resolve,ahead=DEFAULT_METADATA_AHEAD):
+    '''Runs resolve(url) for the next `ahead` URLs on background threads and yields each URL once resolved.
+
+    URLs come out in the order urls lists them, which playlist progress and a
+    channel's date cutoff rely on; while the oldest lookup is still running the
+    ones behind it go on, so a slow watch page only delays its own URL. resolve
+    should warm a cache the download reads from; its errors are ignored because
+    the download reports them itself. Closing the returned generator cancels the
+    lookups that have not started and closes urls.
+    '''
+    source = urls
+    urls = iter(urls)
+    ahead = max(1,int(ahead))
+
+    def resolve_quietly(url):
+        try:
+            resolve(url)
+        except Exception:
+            pass
+        return url
+
+    pool = ThreadPoolExecutor(max_workers=ahead,thread_name_prefix="metadata-prefetch")
+    pending = deque()   #Futures of the URLs handed to the pool, in list order.
+    try:
+        while True:
+            while len(pending) < ahead:
+                url = next(urls,None)
+                if url is None:
+                    break
+                pending.append(pool.submit(resolve_quietly,url))
+            if not pending:
+                return
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False,cancel_futures=True)
+        if hasattr(source,"close"):
+            source.close()
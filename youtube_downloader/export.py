@@ -0,0 +1,191 @@
+'''Bulk export of video info to JSONL, CSV or Parquet.
+
+The URLs may be videos, playlists or channels (see batch.py); every distinct
+video is looked up on a bounded pool of threads, optionally rate limited, and
+its row is written as soon as it arrives, so tens of thousands of videos never
+sit in memory at once. Every format uses the same columns, in EXPORT_COLUMNS
+order. Parquet needs the optional pyarrow package.
+'''
+
+import csv
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED,ThreadPoolExecutor,wait
+
+from . import core
+from .batch import iter_unique_videos,unique_sources
+from .enumeration import prefetch
+from .fields import VIDEO_FIELDS,plan
+from .ratelimit import TokenBucket
+from .urls import video_id
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:     #Parquet export is optional.
+    pyarrow = None
+
+
+#Column -> pyarrow type name. Dates are ISO text, keywords a list (joined with "|" in CSV).
+EXPORT_COLUMNS = {
+    "video_id": "string","url": "string","title": "string","author": "string",
+    "channel_id": "string","channel_url": "string","publish_date": "string",
+    "length": "int64","views": "int64","likes": "int64","rating": "float64",
+    "keywords": "list","description": "string","thumbnail_url": "string","error": "string",
+}
+FORMATS = ("jsonl","csv","parquet")
+PARQUET_BATCH_ROWS = 1000   #Rows buffered per Parquet row group.
+
+
+def info_row(url,info=None,error=None):
+    '''Returns the export row of a video from its fetch_video_info dictionary, or with just the error'''  #Docstring
+    row = {column: None for column in EXPORT_COLUMNS}
+    row.update({key: value for key,value in (info or {}).items() if key in row})
+    row["video_id"] = video_id(url)
+    row["url"] = url
+    row["error"] = error
+    if row["publish_date"] is not None and not isinstance(row["publish_date"],str):
+        row["publish_date"] = row["publish_date"].isoformat()
+    keywords = row["keywords"] or []
+    row["keywords"] = [keywords] if isinstance(keywords,str) else [str(keyword) for keyword in keywords]
+    for column,kind in EXPORT_COLUMNS.items():     #pytubefix sometimes returns numbers as text.
+        if row[column] is not None and kind in ("int64","float64"):
+            try:
+                row[column] = int(row[column]) if kind == "int64" else float(row[column])
+            except (TypeError,ValueError):
+                row[column] = None
+    return row
+
+
+class JsonlWriter:
+    '''Writes one JSON object per line'''
+
+    def __init__(self,path):
+        self._file = open(path,"w",encoding="utf-8")
+
+    def write(self,row):
+        self._file.write(json.dumps(row,ensure_ascii=False,default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter:
+    '''Writes a header and one line per row, keywords joined with "|"'''
+
+    def __init__(self,path):
+        self._file = open(path,"w",encoding="utf-8",newline="")
+        self._writer = csv.DictWriter(self._file,fieldnames=list(EXPORT_COLUMNS))
+        self._writer.writeheader()
+
+    def write(self,row):
+        self._writer.writerow(dict(row,keywords="|".join(row["keywords"])))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    '''Writes rows in row groups of PARQUET_BATCH_ROWS with a fixed schema'''
+
+    def __init__(self,path):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs the pyarrow package: pip install pyarrow")
+        types = {"string": pyarrow.string(),"int64": pyarrow.int64(),"float64": pyarrow.float64(),"list": pyarrow.list_(pyarrow.string())}
+        self._schema = pyarrow.schema([(column,types[kind]) for column,kind in EXPORT_COLUMNS.items()])
+        self._writer = pyarrow.parquet.ParquetWriter(path,self._schema)
+        self._rows = []
+
+    def write(self,row):
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._rows,schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter,"csv": CsvWriter,"parquet": ParquetWriter}
+
+
+def format_of(path):
+    '''Returns the export format named by a file extension, defaulting to jsonl'''  #Docstring
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"json": "jsonl","ndjson": "jsonl","pq": "parquet"}.get(extension,extension) if extension else "jsonl"
+
+
+def export_info(urls,output_path,format=None,workers=8,rate=None,on_result=None,fields=None):
+    '''Writes the info of every video behind urls to output_path and returns (success,message).
+
+    format is "jsonl", "csv" or "parquet" (default: from the file extension),
+    rate caps the info lookups per second across all workers, and
+    on_result(url,success,message) is called for every video. fields limits the
+    lookups to some info fields (see fields.VIDEO_FIELDS); the other columns stay
+    empty, and e.g. leaving out likes and publish_date saves two requests per video.
+    '''  #Docstring
+    format = format or format_of(output_path)
+    if format not in WRITERS:
+        return False,f"Unknown export format: {format}"
+    if fields is not None:
+        try:
+            plan(fields,VIDEO_FIELDS)
+        except ValueError as e:
+            return False,f"{e}"
+
+    sources,duplicates,invalid = unique_sources(urls)
+    if not sources:
+        return False,"No YouTube URLs found"
+
+    limiter = TokenBucket(rate)
+    counts = {}
+    exported = failed = 0
+
+    def fetch(url):
+        '''Looks one video up, never raises'''
+        limiter.acquire()
+        try:
+            return info_row(url,core.fetch_video_info(url,fields))
+        except Exception as e:  #The row still goes out, with the reason in the error column.
+            return info_row(url,error=f"{type(e).__name__}: {e}")
+
+    writer = WRITERS[format](output_path)
+    videos = prefetch(iter_unique_videos(sources,lambda url,message: on_result and on_result(url,False,message),counts))
+    try:
+        with ThreadPoolExecutor(max_workers=max(1,int(workers))) as pool:
+            pending = set()
+            while True:
+                while len(pending) < 2 * max(1,int(workers)):   #Bounded, like the downloads.
+                    url = next(videos,None)
+                    if url is None:
+                        break
+                    pending.add(pool.submit(fetch,url))
+                if not pending:
+                    break
+                finished,pending = wait(pending,return_when=FIRST_COMPLETED)
+                for future in finished:
+                    row = future.result()
+                    writer.write(row)   #Only this thread writes, so the writers need no lock.
+                    if row["error"]:
+                        failed += 1
+                    else:
+                        exported += 1
+                    if on_result:
+                        on_result(row["url"],not row["error"],row["error"] or row["title"] or "OK")
+    finally:
+        videos.close()
+        writer.close()
+
+    message = f"Exported {exported} videos to {output_path}"
+    if failed:
+        message += f", {failed} failed"
+    if duplicates + counts["repeated"]:
+        message += f", {duplicates + counts['repeated']} duplicates exported once"
+    if invalid:
+        message += f", {invalid} URLs ignored"
+    return exported > 0,message
@@ -0,0 +1,90 @@
+'''Thin wrapper around the ffmpeg executable.
+
+ffmpeg is optional: it is only needed to join separate video and audio streams
+(YouTube only offers 1080p and above that way) and to convert audio. Streams are
+copied, never re-encoded, unless the requested audio format needs another codec.
+'''
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+#Output container and the codec each audio format needs. When the source stream already
+#has that codec ("copy_from") it is only remuxed, otherwise it is transcoded.
+AUDIO_FORMATS = {
+    "mp3": {"container": "mp3","copy_from": None,"encode": ["-c:a","libmp3lame","-q:a","2"]},
+    "m4a": {"container": "ipod","copy_from": "mp4","encode": ["-c:a","aac","-b:a","160k"]},
+    "opus": {"container": "opus","copy_from": "webm","encode": ["-c:a","libopus","-b:a","128k"]},
+}
+
+
+class FFmpegError(Exception):
+    '''Raised when ffmpeg is missing or fails'''
+
+
+def ffmpeg_path():
+    '''Returns the path of the ffmpeg executable, or None if it is not installed'''  #Docstring
+    return os.environ.get("FFMPEG_BINARY") or shutil.which("ffmpeg")
+
+
+def mux(video_path,audio_path,output_path,container):
+    '''Joins a video-only and an audio-only file into output_path without re-encoding'''  #Docstring
+    executable = ffmpeg_path()
+    if not executable:
+        raise FFmpegError("ffmpeg is required to join video and audio streams, please install it")
+
+    #Write under a temporary name so an interrupted mux never looks like a finished file.
+    temp_path = output_path + ".muxing"
+    command = [executable,"-y","-loglevel","error",
+               "-i",video_path,"-i",audio_path,
+               "-map","0:v:0","-map","1:a:0","-c","copy",   #Stream copy: no re-encode.
+               "-f",container,temp_path]
+    result = subprocess.run(command,stdout=subprocess.DEVNULL,stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise FFmpegError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {result.returncode}")
+
+    os.replace(temp_path,output_path)
+    return output_path
+
+
+def convert_audio_stream(chunks,output_path,format,source_subtype):
+    '''Pipes the audio bytes into ffmpeg as they arrive and writes output_path in the given audio format'''  #Docstring
+    executable = ffmpeg_path()
+    if not executable:
+        raise FFmpegError(f"ffmpeg is required to convert audio to {format}, please install it")
+
+    settings = AUDIO_FORMATS[format]
+    codec = ["-c:a","copy"] if settings["copy_from"] == source_subtype else settings["encode"]
+    temp_path = output_path + ".converting"
+    command = [executable,"-y","-loglevel","error","-i","pipe:0","-vn",*codec,"-f",settings["container"],temp_path]
+
+    #stderr goes to a file so ffmpeg can never block on a full pipe while we are writing to it.
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command,stdin=subprocess.PIPE,stdout=subprocess.DEVNULL,stderr=errors)
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass    #ffmpeg stopped early, its exit code and message below tell why.
+        except BaseException:
+            process.kill()
+            process.wait()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        returncode = process.wait()
+        errors.seek(0)
+        message = errors.read().decode(errors="replace").strip()
+
+    if returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise FFmpegError(message or f"ffmpeg exited with {returncode}")
+
+    os.replace(temp_path,output_path)
+    return output_path
@@ -0,0 +1,73 @@
+'''Field planner: looks up only the info fields that were asked for.
+
+pytubefix reads the fields of one object from different requests: a video's
+from the player API (most of them), the watch page (publish date) and the
+"next" API (likes); a channel's from its videos, home and about pages, and it
+fetches the page again every time a property switches to another one. Reading
+a whole info dictionary therefore pays for every request even when the caller
+shows two fields. The tables below map each field to the request that provides
+it, plan() groups the wanted fields so every needed request is made once and no
+other, and fetch_info() skips the fields already cached, so asking for one more
+field later only fetches what is new.
+'''
+
+from .cache import cache
+
+
+#Field -> request that provides it, in the order the info dictionaries list them.
+#None marks fields every page of the object carries; they are read from whichever page is loaded.
+VIDEO_FIELDS = {
+    "title": "player","description": "player","rating": "player","length": "player","views": "player",
+    "likes": "next","channel_url": "player","publish_date": "watch_page","thumbnail_url": "player",
+    "author": "player","keywords": "player","channel_id": "player",
+}
+PLAYLIST_FIELDS = {     #The first playlist page's sidebar has them all, length included: nothing is enumerated.
+    "title": "page","last_updated": "page","thumbnail_url": "page","description": "page","length": "page",
+    "views": "page","owner": "page","owner_id": "page","owner_url": "page","playlist_id": None,
+}
+CHANNEL_FIELDS = {
+    "channel_name": None,"channel_id": None,"last_updated": "videos_page","thumbnail_url": "home_page",
+    "description": "home_page","length": None,"views": "about_page",
+}
+
+
+def plan(fields,table):
+    '''Returns the fields grouped by request as [(request,[field,...]),...], page-independent fields last.
+
+    Raises ValueError for a field the table does not know.
+    '''  #Docstring
+    unknown = [field for field in fields if field not in table]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)} (known: {', '.join(table)})")
+    groups = {}     #Maps request -> its fields, in the order requests are first needed.
+    for field in fields:
+        groups.setdefault(table[field],[]).append(field)
+    anywhere = groups.pop(None,None)
+    return list(groups.items()) + ([(None,anywhere)] if anywhere else [])
+
+
+def read_fields(source,fields,table):
+    '''Reads fields from a pytubefix YouTube, Playlist or Channel one request group after the other'''  #Docstring
+    values = {}
+    for request,group in plan(fields,table):
+        for field in group:
+            values[field] = getattr(source,field)   #The first field of a group makes its request, the rest reuse it.
+    return values
+
+
+def fetch_info(kind,key,get_source,table,fields=None):
+    '''Returns {field: value} for fields (every field of table when None), reading only the ones not cached yet.
+
+    get_source() returns the pytubefix object and is only called when something
+    is missing. The cached dictionary grows with every lookup, so the fields
+    fetched for one caller serve the next one.
+    '''  #Docstring
+    fields = list(table) if fields is None else list(fields)
+    plan(fields,table)  #Rejects unknown fields before any request.
+    info = cache.get(kind,key) or {}
+    missing = [field for field in fields if field not in info]
+    if missing:
+        values = read_fields(get_source(),missing,table)
+        info = dict(cache.get(kind,key) or info,**values)   #Keep fields another thread added meanwhile.
+        cache.put(kind,key,info,persist=True)
+    return {field: info[field] for field in fields}
@@ -0,0 +1,95 @@
+'''Date, duration and keyword filters for bulk channel downloads.
+
+A filter only reads a video's metadata (its watch page), never its streams, so
+videos that do not match are dropped before any media request is made.
+'''
+
+from collections import namedtuple
+from datetime import date,datetime
+
+
+#Every field is optional: after/before are dates, min_length/max_length are seconds and
+#keywords is a list of words of which at least one must be in the title or the tags.
+VideoFilter = namedtuple("VideoFilter","after before min_length max_length keywords",defaults=(None,None,None,None,()))
+
+
+def parse_date(text):
+    '''Returns the date of a "YYYY-MM-DD" text, or None for an empty text'''  #Docstring
+    text = (text or "").strip()
+    return datetime.strptime(text,"%Y-%m-%d").date() if text else None
+
+
+def is_empty(video_filter):
+    '''Returns True if the filter lets every video through'''  #Docstring
+    return video_filter is None or not any(video_filter)
+
+
+def published_date(yt):
+    '''Returns the date a video was published, or None if YouTube does not say'''  #Docstring
+    published = yt.publish_date
+    if isinstance(published,datetime):
+        return published.date()
+    return published if isinstance(published,date) else None
+
+
+def needed_fields(video_filter):
+    '''Returns the video info fields (see fields.VIDEO_FIELDS) check() reads for this filter'''  #Docstring
+    if is_empty(video_filter):
+        return []
+    needed = []
+    if video_filter.after or video_filter.before:
+        needed.append("publish_date")
+    if video_filter.min_length or video_filter.max_length:
+        needed.append("length")
+    if video_filter.keywords:
+        needed += ["title","keywords"]
+    return needed
+
+
+def check(yt,video_filter):
+    '''Returns None if the video passes the filter, otherwise the reason it was skipped'''  #Docstring
+    if is_empty(video_filter):
+        return None
+
+    if video_filter.after or video_filter.before:
+        published = published_date(yt)
+        if published:
+            if video_filter.after and published < video_filter.after:
+                return f"published {published}, before {video_filter.after}"
+            if video_filter.before and published > video_filter.before:
+                return f"published {published}, after {video_filter.before}"
+
+    if video_filter.min_length or video_filter.max_length:
+        length = yt.length or 0
+        if video_filter.min_length and length < video_filter.min_length:
+            return f"{length}s long, shorter than {video_filter.min_length}s"
+        if video_filter.max_length and length > video_filter.max_length:
+            return f"{length}s long, longer than {video_filter.max_length}s"
+
+    if video_filter.keywords:
+        text = " ".join([yt.title or ""] + list(yt.keywords or [])).lower()
+        if not any(keyword.lower() in text for keyword in video_filter.keywords):
+            return "no keyword matched"
+
+    return None
+
+
+def to_dict(video_filter):
+    '''Returns the filter as JSON friendly values, for the queue journal'''  #Docstring
+    if is_empty(video_filter):
+        return {}
+    values = video_filter._asdict()
+    for name in ("after","before"):
+        if values[name]:
+            values[name] = values[name].isoformat()
+    values["keywords"] = list(values["keywords"])
+    return values
+
+
+def from_dict(values):
+    '''Rebuilds a filter saved with to_dict()'''  #Docstring
+    values = dict(values or {})
+    for name in ("after","before"):
+        values[name] = parse_date(values.get(name))
+    values["keywords"] = tuple(values.get("keywords") or ())
+    return VideoFilter(**values)
@@ -0,0 +1,156 @@
+'''Integrity of downloaded files: digests computed while writing, size checks and fast verification.
+
+A file downloaded in parallel byte ranges is written out of order, so a plain
+SHA-256 of it could only be computed by reading it back afterwards. Its digest
+is therefore built from fixed-size pieces instead: every piece (PIECE_SIZE
+bytes, the ranges are cut on piece boundaries) is hashed by the range that
+writes it while the bytes go to disk, and the digest is the SHA-256 of the
+piece hashes in file order:
+
+    sha256-pieces:<piece size>:<hex digest>
+
+Only pieces that an interrupted earlier attempt wrote are read back. The same
+layout lets verify_files() hash the pieces of a file in parallel straight from
+a memory map. Archives written before this format hold plain SHA-256 hex
+digests; they are still checked, one file per thread.
+'''
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .segmented import SegmentedDownloadError
+
+
+PIECE_SIZE = 1024 * 1024    #Bytes per hashed piece; also the alignment of the download ranges.
+DIGEST_PREFIX = "sha256-pieces"
+
+
+class IncompleteDownloadError(SegmentedDownloadError):
+    '''Raised when a finished download is not as large as the stream; retried like a dropped connection'''
+
+
+def format_digest(piece_hashes,piece_size=PIECE_SIZE):
+    '''Returns the digest text of a file from the raw SHA-256 digests of its pieces'''  #Docstring
+    return f"{DIGEST_PREFIX}:{piece_size}:{hashlib.sha256(b''.join(piece_hashes)).hexdigest()}"
+
+
+def check_size(path,expected):
+    '''Raises IncompleteDownloadError unless the file at path has exactly expected bytes'''  #Docstring
+    size = os.path.getsize(path)
+    if size != expected:
+        raise IncompleteDownloadError(f"Download incomplete: {size} of {expected} bytes written to {os.path.basename(path)}")
+
+
+class InlineHasher:
+    '''Hashes the pieces of a file from the chunks written to it, in any order of pieces.
+
+    update() may be called from several threads as long as every piece is
+    written by one thread, front to back, which the piece-aligned ranges of a
+    segmented download guarantee.
+    '''
+
+    def __init__(self,total_size,piece_size=PIECE_SIZE):
+        self.total_size = total_size
+        self.piece_size = piece_size
+        count = -(-total_size // piece_size)    #-(-a // b) rounds up.
+        self._hashes = [None] * count   #hashlib object of every piece started in this attempt.
+        self._hashed = [0] * count      #Bytes of every piece hashed so far.
+        self.reread = 0     #Bytes digest() had to read back from disk.
+
+    def update(self,position,data):
+        '''Hashes data, which was just written at byte offset position'''
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            index,inside = divmod(position + offset,self.piece_size)
+            take = min(len(view) - offset,self.piece_size - inside)
+            if self._hashed[index] == inside:   #Continues the piece; a piece resumed mid-way is read back instead.
+                if inside == 0:
+                    self._hashes[index] = hashlib.sha256()
+                self._hashes[index].update(view[offset:offset + take])
+                self._hashed[index] += take
+            offset += take
+
+    def digest(self,path):
+        '''Returns the digest text of the file at path, reading back only the pieces not hashed while writing'''
+        piece_hashes = []
+        with open(path,"rb") as f:
+            for index,hashed in enumerate(self._hashed):
+                length = min(self.piece_size,self.total_size - index * self.piece_size)
+                if hashed == length:
+                    piece_hashes.append(self._hashes[index].digest())
+                    continue
+                f.seek(index * self.piece_size)
+                piece_hashes.append(hashlib.sha256(f.read(length)).digest())
+                self.reread += length
+        return format_digest(piece_hashes,self.piece_size)
+
+
+def _hash_pieces(view,size,piece_size,pool):
+    '''Returns the raw SHA-256 digests of the pieces of a memory mapped file, hashed on pool'''
+    #hashlib releases the GIL on large buffers, so the pieces really are hashed in parallel.
+    return list(pool.map(lambda start: hashlib.sha256(view[start:start + piece_size]).digest(),range(0,size,piece_size)))
+
+
+def file_digest(path,piece_size=PIECE_SIZE,pool=None):
+    '''Returns the digest text of a file on disk, hashing its pieces in parallel from a memory map'''  #Docstring
+    size = os.path.getsize(path)
+    if size == 0:
+        return format_digest([],piece_size)
+    own_pool = pool is None
+    pool = pool or ThreadPoolExecutor(max_workers=os.cpu_count() or 4,thread_name_prefix="hash")
+    try:
+        with open(path,"rb") as f,mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return format_digest(_hash_pieces(view,size,piece_size,pool),piece_size)
+            finally:
+                view.release()  #The map cannot close while a view of it exists.
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+
+def plain_sha256(path):
+    '''Returns the SHA-256 hex digest of a whole file, the format of older archives'''  #Docstring
+    if os.path.getsize(path) == 0:
+        return hashlib.sha256().hexdigest()
+    with open(path,"rb") as f,mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mapped:
+        return hashlib.sha256(mapped).hexdigest()
+
+
+def check_file(path,size,digest,pool=None):
+    '''Returns (status,detail) of a recorded file: "ok", "missing", "size", "corrupt" or "error"'''  #Docstring
+    try:
+        actual = os.path.getsize(path)
+        if actual != size:
+            return "size",f"{actual} bytes, expected {size}"
+        if not digest:
+            return "ok","size only, no digest recorded"
+        if digest.startswith(DIGEST_PREFIX + ":"):
+            piece_size = int(digest.split(":")[1])
+            matches = file_digest(path,piece_size,pool) == digest
+        else:
+            matches = plain_sha256(path) == digest
+        return ("ok","") if matches else ("corrupt","content differs from the recorded digest")
+    except FileNotFoundError:
+        return "missing",""
+    except (OSError,ValueError) as e:
+        return "error",f"{e}"
+
+
+def verify_files(entries,workers=None):
+    '''Checks recorded files and yields (entry,status,detail) in the order of entries.
+
+    entries are dictionaries with "path", "size" and "digest". Several files are
+    checked at the same time, and the pieces of each file are hashed in parallel
+    on a shared pool, so one large file keeps every core busy as well.
+    '''
+    workers = max(1,int(workers or os.cpu_count() or 4))
+    with ThreadPoolExecutor(max_workers=workers,thread_name_prefix="hash") as pieces,\
+         ThreadPoolExecutor(max_workers=workers,thread_name_prefix="verify") as files:
+        results = files.map(lambda entry: (entry,*check_file(entry["path"],entry["size"],entry["digest"],pieces)),entries)
+        for result in results:
+            yield result
@@ -0,0 +1,322 @@
+'''Persistent download queue with priorities and concurrency limits.
+
+Every download is a job row in a small SQLite journal, so queued work survives
+an app restart. A scheduler thread starts the queued job with the highest
+priority (oldest first) whenever both the global concurrency limit and the
+limit for the job's host allow it. Jobs move through the states
+queued -> running -> done/failed.
+
+Several processes may share a journal (the GUI and `queue run`, or `queue list`
+while either runs). A job is claimed only if it is still queued, and a running
+job carries its owner and a heartbeat the owner refreshes; only running jobs
+whose heartbeat stopped, because their process ended, are queued again.
+'''
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from . import batch,core,filters
+from .archive import DownloadArchive,default_archive_path
+from .ratelimit import TokenBucket
+from .urls import channel_key
+
+
+DEFAULT_JOURNAL = os.path.join(os.path.expanduser("~"),".youtube_downloader_queue.sqlite")
+DEFAULT_MAX_CONCURRENT = 2  #Jobs running at the same time.
+DEFAULT_PER_HOST_LIMIT = 2  #Jobs running at the same time against one host.
+HEARTBEAT_SECONDS = 2   #How often a scheduler marks its running jobs as alive, rereads their limits and looks for jobs queued by other processes.
+STALE_SECONDS = 30      #A running job without a heartbeat for this long belongs to a process that ended.
+
+QUEUED,RUNNING,DONE,FAILED = "queued","running","done","failed"
+
+
+def host_of(url):
+    '''Returns the host a job talks to, with www./m. stripped so youtube.com variants share a limit'''  #Docstring
+    host = urlsplit(url).netloc.lower()
+    for prefix in ("www.","m.","music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return "youtube.com" if host == "youtu.be" else host
+
+
+def kind_of(url):
+    '''Returns "playlist" for youtube.com/playlist URLs, "channel" for channel URLs and "video" for everything else'''  #Docstring
+    if urlsplit(url).path.rstrip("/") == "/playlist":
+        return "playlist"
+    return "channel" if channel_key(url) else "video"
+
+
+def run_job(job,on_progress=None,on_result=None):
+    '''Runs one job through the headless core and returns its (success,message)'''  #Docstring
+    #Playlists and channels report a 0.0-1.0 fraction, jobs always report (done,total).
+    progress = (lambda fraction: on_progress(fraction,1.0)) if on_progress else None
+    options = json.loads(job["options"] or "{}")
+    #A job's own bandwidth limit, on top of the global one. The queue passes the bucket in so it can change it while the job runs.
+    limiter = job.get("limiter") or TokenBucket(options.get("bandwidth"))
+    #Sync jobs skip what the archive in the download folder already has.
+    archive = DownloadArchive(default_archive_path(job["savepath"])) if options.get("sync") else None
+    try:
+        if job["kind"] == "channel":
+            return core.channel_download(link=job["url"],res=job["res"],format=job["format"],path=job["savepath"],workers=job["workers"],\
+                                         tabs=options.get("tabs",["videos"]),video_filter=filters.from_dict(options.get("filter")),\
+                                         on_progress=progress,on_result=on_result,archive=archive,limiter=limiter)
+        if job["kind"] == "playlist":
+            return core.playlist_download(link=job["url"],res=job["res"],format=job["format"],path=job["savepath"],workers=job["workers"],\
+                                          on_progress=progress,on_result=on_result,archive=archive,limiter=limiter)
+        if job["kind"] == "batch":  #The "url" of a batch job is the path of its URL file.
+            return batch.batch_download(batch.read_url_file(job["url"]),job["savepath"],job["res"],job["format"],workers=job["workers"],\
+                                        on_progress=progress,on_result=on_result,archive=archive,limiter=limiter)
+    finally:
+        if archive is not None:
+            archive.close()
+    return core.video_download(link=job["url"],savepath=job["savepath"],res=job["res"],format=job["format"],progress_callback=on_progress,limiter=limiter)
+
+
+class DownloadQueue:
+    '''SQLite backed job queue with a scheduler thread'''
+
+    def __init__(self,path=DEFAULT_JOURNAL,max_concurrent=DEFAULT_MAX_CONCURRENT,per_host_limit=DEFAULT_PER_HOST_LIMIT,runner=run_job):
+        self.max_concurrent = max_concurrent
+        self.per_host_limit = per_host_limit
+        self.runner = runner    #runner(job,on_progress,on_result) -> (success,message), swappable for a local stand-in.
+        self.progress = {}      #Maps job id -> fraction downloaded, kept in memory only.
+        self.listeners = []     #Called with the job id whenever a job changes state.
+        self._callbacks = {}    #Maps job id -> (on_progress,on_result,on_done) given to add().
+        self._running = {}      #Maps running job id -> host.
+        self._limiters = {}     #Maps running job id -> its bandwidth TokenBucket.
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._owner = uuid.uuid4().hex  #Marks the jobs this queue runs, apart from other processes on the same journal.
+        self._last_beat = 0.0
+
+        self._db = sqlite3.connect(path,check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                kind TEXT, url TEXT, savepath TEXT, res TEXT, format TEXT, workers INTEGER DEFAULT 4,
+                                priority INTEGER DEFAULT 0, state TEXT, message TEXT DEFAULT '',
+                                created REAL, updated REAL, options TEXT DEFAULT '{}', owner TEXT, heartbeat REAL)""")
+        #Older journals lack the options, owner and heartbeat columns.
+        columns = [row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")]
+        for column,kind in (("options","TEXT DEFAULT '{}'"),("owner","TEXT"),("heartbeat","REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, priority, id)")
+        self._db.commit()
+        #Jobs left running by a process that stopped are only queued again by a scheduler (see _beat()),
+        #so listing or editing the queue never touches the jobs another process is running.
+
+    def add(self,kind,url,savepath,res,format,priority=0,workers=4,options=None,on_progress=None,on_result=None,on_done=None):
+        '''Queues a "video", "playlist", "channel" or "batch" job and returns its id.
+
+        workers is the number of videos a playlist or channel job downloads at once,
+        options holds the "tabs" and "filter" of a channel job, "sync" for playlist,
+        channel and batch jobs that should only fetch what the folder's archive lacks
+        and "bandwidth", the job's own limit in bytes per second.
+        A batch job's url is the path of a file of URLs. The
+        optional callbacks are not persisted: on_progress(done,total) and
+        on_result(url,success,message) are passed to the runner, on_done(success,message)
+        is called when the job finishes.
+        '''
+        now = time.time()
+        with self._condition:
+            cursor = self._db.execute("INSERT INTO jobs (kind, url, savepath, res, format, workers, options, priority, state, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",\
+                                      (kind,url,savepath,res,format,workers,json.dumps(options or {}),priority,QUEUED,now,now))
+            self._db.commit()
+            job_id = cursor.lastrowid
+            self._callbacks[job_id] = (on_progress,on_result,on_done)
+            self._condition.notify_all()
+        self._notify(job_id)
+        return job_id
+
+    def start(self):
+        '''Starts the scheduler thread'''
+        with self._condition:
+            self._stopping = False
+            if self._thread:    #Still beating for the jobs running since stop().
+                self._condition.notify_all()
+                return
+            self._thread = threading.Thread(target=self._schedule,name="download-scheduler",daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        '''Stops starting new jobs; running ones finish in the background'''
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread if not self._running else None
+        if thread:
+            thread.join()
+
+    def set_limits(self,max_concurrent=None,per_host_limit=None):
+        '''Changes the concurrency limits at runtime'''
+        with self._condition:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1,int(max_concurrent))
+            if per_host_limit is not None:
+                self.per_host_limit = max(1,int(per_host_limit))
+            self._condition.notify_all()
+
+    def set_bandwidth(self,job_id,rate):
+        '''Changes a job's own bandwidth limit in bytes per second (None for unlimited), also while it runs'''
+        with self._condition:
+            row = self._db.execute("SELECT options FROM jobs WHERE id = ?",(job_id,)).fetchone()
+            if row is None:
+                return
+            options = dict(json.loads(row["options"] or "{}"),bandwidth=rate)
+            self._db.execute("UPDATE jobs SET options = ? WHERE id = ?",(json.dumps(options),job_id))
+            self._db.commit()
+            limiter = self._limiters.get(job_id)
+        if limiter is not None:
+            limiter.set_rate(rate)
+        self._notify(job_id)
+
+    def set_priority(self,job_id,priority):
+        '''Changes the priority of a queued job, higher runs first'''
+        self._update("UPDATE jobs SET priority = ? WHERE id = ? AND state = ?",(priority,job_id,QUEUED),job_id)
+
+    def move_to_top(self,job_id):
+        '''Gives a queued job a higher priority than every other job'''
+        with self._condition:
+            highest = self._db.execute("SELECT COALESCE(MAX(priority), 0) FROM jobs").fetchone()[0]
+        self.set_priority(job_id,highest + 1)
+
+    def remove(self,job_id):
+        '''Removes a job that is not running'''
+        self._update("DELETE FROM jobs WHERE id = ? AND state != ?",(job_id,RUNNING),job_id)
+
+    def retry(self,job_id):
+        '''Queues a failed job again'''
+        self._update("UPDATE jobs SET state = ?, message = '' WHERE id = ? AND state = ?",(QUEUED,job_id,FAILED),job_id)
+
+    def clear_finished(self):
+        '''Removes every done job from the journal'''
+        self._update("DELETE FROM jobs WHERE state = ?",(DONE,),None)
+
+    def jobs(self,limit=None):
+        '''Returns jobs as dictionaries: running first, then queued by priority, then the latest finished'''
+        query = """SELECT * FROM jobs ORDER BY CASE state WHEN 'running' THEN 0 WHEN 'queued' THEN 1 ELSE 2 END,
+                   CASE WHEN state = 'queued' THEN -priority ELSE 0 END, CASE WHEN state = 'queued' THEN id ELSE -updated END"""
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._condition:
+            return [dict(row) for row in self._db.execute(query)]
+
+    def job(self,job_id):
+        '''Returns one job as a dictionary, or None if it was removed'''
+        with self._condition:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?",(job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        '''Returns the number of jobs in each state'''
+        with self._condition:
+            return {state: count for state,count in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
+
+    def wait(self):
+        '''Blocks until no job is queued or running'''
+        with self._condition:
+            while self._running or self._db.execute("SELECT 1 FROM jobs WHERE state = ? LIMIT 1",(QUEUED,)).fetchone():
+                self._condition.wait(HEARTBEAT_SECONDS)     #Other processes may take queued jobs without waking us.
+
+    def _update(self,query,params,job_id):
+        '''Runs one statement on the journal and wakes the scheduler'''
+        with self._condition:
+            self._db.execute(query,params)
+            self._db.commit()
+            self._condition.notify_all()
+        self._notify(job_id)
+
+    def _notify(self,job_id):
+        for listener in list(self.listeners):
+            listener(job_id)
+
+    def _next_job(self):
+        '''Returns the next job allowed to start, or None (lock held)'''
+        if len(self._running) >= self.max_concurrent:
+            return None
+        busy_hosts = list(self._running.values())
+        for row in self._db.execute("SELECT * FROM jobs WHERE state = ? ORDER BY priority DESC, id",(QUEUED,)):
+            if busy_hosts.count(host_of(row["url"])) < self.per_host_limit:
+                return dict(row)
+        return None
+
+    def _beat(self):
+        '''Refreshes the heartbeat and limits of the running jobs and queues again the jobs of stopped processes (lock held)'''
+        now = time.time()
+        if now - self._last_beat < HEARTBEAT_SECONDS:
+            return
+        self._last_beat = now
+        if self._running:
+            self._db.execute(f"UPDATE jobs SET heartbeat = ? WHERE id IN ({','.join('?' * len(self._running))})",(now,*self._running))
+            #`queue limit` in another process only changes the journal; the buckets of the jobs running here follow it.
+            for row in self._db.execute(f"SELECT id, options FROM jobs WHERE id IN ({','.join('?' * len(self._limiters))})",tuple(self._limiters)):
+                rate = json.loads(row["options"] or "{}").get("bandwidth")
+                limiter = self._limiters[row["id"]]
+                if (rate if rate and rate > 0 else None) != limiter.rate:
+                    limiter.set_rate(rate)
+        #They start over and resume their .part files.
+        self._db.execute("UPDATE jobs SET state = ?, owner = NULL WHERE state = ? AND (owner IS NULL OR owner != ?) AND (heartbeat IS NULL OR heartbeat < ?)",\
+                         (QUEUED,RUNNING,self._owner,now - STALE_SECONDS))
+        self._db.commit()
+
+    def _schedule(self):
+        '''Scheduler thread: starts jobs whenever the limits allow, and keeps beating until its jobs ended after stop()'''
+        with self._condition:
+            while not self._stopping or self._running:
+                self._beat()
+                job = None if self._stopping else self._next_job()
+                if job is None:
+                    self._condition.wait(HEARTBEAT_SECONDS)     #Woken by add(), a finished job, new limits or the next beat.
+                    continue
+                now = time.time()
+                cursor = self._db.execute("UPDATE jobs SET state = ?, owner = ?, heartbeat = ?, updated = ? WHERE id = ? AND state = ?",\
+                                          (RUNNING,self._owner,now,now,job["id"],QUEUED))
+                self._db.commit()
+                if cursor.rowcount != 1:    #Another process on the same journal claimed it first.
+                    continue
+                self._running[job["id"]] = host_of(job["url"])
+                threading.Thread(target=self._run,args=(job,),name=f"download-job-{job['id']}",daemon=True).start()
+            self._thread = None
+
+    def _run(self,job):
+        '''Runs one job on its own thread and records the outcome'''
+        job_id = job["id"]
+        self._notify(job_id)
+        on_progress,on_result,on_done = self._callbacks.get(job_id,(None,None,None))
+
+        def progress(done,total):
+            self.progress[job_id] = done / total if total else 0.0
+            if on_progress:
+                on_progress(done,total)
+
+        limiter = TokenBucket(json.loads(job["options"] or "{}").get("bandwidth"))
+        with self._condition:
+            self._limiters[job_id] = limiter
+        try:
+            success,message = self.runner(dict(job,limiter=limiter),progress,on_result)
+        except Exception as e:  #A runner should return (False,message), but never lose the job if it raises.
+            success,message = False,f"{e}"
+
+        with self._condition:
+            self._db.execute("UPDATE jobs SET state = ?, message = ?, updated = ? WHERE id = ? AND owner = ?",(DONE if success else FAILED,message,time.time(),job_id,self._owner))
+            self._db.commit()
+            self._callbacks.pop(job_id,None)
+            self._limiters.pop(job_id,None)
+            self.progress.pop(job_id,None)
+
+        try:
+            self._notify(job_id)
+            if on_done:
+                on_done(success,message)
+        finally:
+            #Only free the slot now, so wait() never returns before the listeners heard about this job.
+            with self._condition:
+                del self._running[job_id]
+                self._condition.notify_all()
@@ -0,0 +1,138 @@
+'''Per-video rows of a playlist for a virtualized table.
+
+A playlist of thousands of videos can neither get one widget row per video nor
+one lookup per video before anything is shown. VideoListing enumerates the
+playlist on a background thread, holding a small dictionary per video, and
+looks the details of a row (title, duration, views, availability) up only once
+a view asks for its range with show(), plus some rows ahead. Rows therefore
+fill in while the user scrolls, and rows that are never shown cost no request.
+Background threads only touch the rows under a lock and then call on_change(),
+which the GUI turns into one redraw of the visible rows per frame.
+'''
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pytubefix.exceptions import VideoUnavailable
+
+from . import core
+from .enumeration import expected_length,iter_video_urls
+
+
+ROW_FIELDS = ["title","length","views"]     #All read from the player API: one request per row.
+DEFAULT_WORKERS = 4     #Rows looked up at the same time.
+DEFAULT_AHEAD = 20      #Rows looked up past the end of the shown range, so scrolling finds them ready.
+
+#pytubefix error -> status shown for the video. Other VideoUnavailable errors show "unavailable".
+ERROR_STATUS = {"VideoPrivate": "private","MembersOnly": "members only","AgeRestrictedError": "age restricted",
+                "AgeCheckRequiredError": "age restricted","LoginRequired": "login required","VideoRegionBlocked": "region blocked",
+                "LiveStreamError": "live","LiveStreamOffline": "live","RecordingUnavailable": "live"}
+
+
+def error_status(error):
+    '''Returns the short availability status of a video whose lookup raised error'''  #Docstring
+    if type(error).__name__ in ERROR_STATUS:
+        return ERROR_STATUS[type(error).__name__]
+    return "unavailable" if isinstance(error,VideoUnavailable) else "error"
+
+
+def format_length(seconds):
+    '''Returns a duration in seconds as "m:ss" or "h:mm:ss"'''  #Docstring
+    minutes,seconds = divmod(int(seconds),60)
+    hours,minutes = divmod(minutes,60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def display_row(row):
+    '''Returns the texts a table shows for a row: {"title","length","views","status"}'''  #Docstring
+    if row["status"] is None or row["status"] == "loading":
+        return {"title": row["url"],"length": "","views": "","status": "…"}
+    try:
+        length = format_length(row["length"]) if row.get("length") is not None else ""
+    except (TypeError,ValueError):
+        length = str(row["length"])
+    views = row.get("views")
+    return {"title": row.get("title") or row["url"],"length": length,"views": f"{views:,}" if isinstance(views,int) else str(views or ""),
+            "status": row["status"]}
+
+
+class VideoListing:
+    '''Rows of the videos of a playlist, enumerated and looked up on background threads.
+
+    Every row is a dictionary with the video "url", a "status" (None until it is
+    wanted, then "loading", "available" or why the video cannot be played) and,
+    once available, the ROW_FIELDS. on_change() is called from the background
+    threads after rows are added or filled in.
+    '''
+
+    def __init__(self,url,on_change=None,workers=DEFAULT_WORKERS,ahead=DEFAULT_AHEAD):
+        self.url = url
+        self.expected = None    #Video count the playlist advertises, known after its first page.
+        self.finished = False   #True once every video is listed.
+        self.error = None       #Error that stopped the enumeration, if any.
+        self._rows = []
+        self._on_change = on_change or (lambda: None)
+        self._ahead = ahead
+        self._wanted = (0,0)    #Range of rows the view shows.
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(1,int(workers)),thread_name_prefix="listing-lookup")
+        threading.Thread(target=self._enumerate,name="listing-enumerate",daemon=True).start()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def show(self,first,last):
+        '''Marks rows first..last-1 as shown, looks them up if needed and returns copies of them'''
+        with self._lock:
+            self._wanted = (first,last)
+            self._schedule()
+            return [dict(row) for row in self._rows[first:last]]
+
+    def close(self):
+        '''Stops listing and looking up; lookups already running finish quietly'''
+        self._closed.set()
+        self._pool.shutdown(wait=False,cancel_futures=True)
+
+    def _schedule(self):
+        '''Submits lookups for the wanted rows (and the ones ahead) not looked up yet; needs the lock'''
+        if self._closed.is_set():
+            return
+        first,last = self._wanted
+        for index in range(first,min(len(self._rows),last + self._ahead)):
+            if self._rows[index]["status"] is None:
+                self._rows[index]["status"] = "loading"
+                self._pool.submit(self._lookup,index)
+
+    def _lookup(self,index):
+        with self._lock:
+            first,last = self._wanted
+            if self._closed.is_set() or not first <= index < last + self._ahead:
+                self._rows[index]["status"] = None  #Scrolled away before its turn: looked up again if it comes back.
+                return
+            url = self._rows[index]["url"]
+        try:
+            values = dict(core.fetch_video_info(url,fields=ROW_FIELDS),status="available")
+        except Exception as e:
+            values = {"status": error_status(e)}
+        with self._lock:
+            self._rows[index].update(values)
+        self._on_change()
+
+    def _enumerate(self):
+        try:
+            playlist = core.get_playlist(self.url)  #Shared with the playlist details looked up just before.
+            self.expected = expected_length(playlist)
+            for url in iter_video_urls(playlist):
+                if self._closed.is_set():
+                    return
+                with self._lock:
+                    self._rows.append({"url": url,"status": None})
+                    if len(self._rows) <= self._wanted[1] + self._ahead:    #A new row the view is waiting for.
+                        self._schedule()
+                self._on_change()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self._on_change()
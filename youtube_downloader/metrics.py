@@ -0,0 +1,241 @@
+'''Timings, throughput and retries of every download, for finding out where time goes.
+
+Each video download records how long its phases took: "page" (building the
+YouTube object and fetching the watch page), "streams" (resolving the stream
+manifest) and "transfer" (downloading, muxing or converting the bytes), plus its
+size, bytes per second and retries. Playlist, channel and batch runs add up the
+videos they ran. The numbers can be read three ways:
+
+- snapshot(), a dictionary the GUI's Stats tab shows live
+- a JSON log with one line per finished video and run (enable_json_log)
+- Prometheus text exposition, returned by prometheus_text() or served over HTTP
+  by serve_prometheus() for a scraper
+'''
+
+import http.server
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+PHASES = ("page","streams","transfer")
+RECENT_VIDEOS = 100     #Finished videos kept for the live panel.
+THROUGHPUT_WINDOW = 5.0     #Seconds the live bytes per second is averaged over.
+DEFAULT_PORT = 9464     #Port of the optional Prometheus endpoint.
+
+
+class VideoStats:
+    '''Timings of one video download, filled in while it runs'''
+
+    def __init__(self,url,run=None):
+        self.url = url
+        self.run = run
+        self.started = time.monotonic()
+        self.phases = {}    #Maps phase -> seconds, summed over retries.
+        self.bytes = 0
+        self.retries = 0
+
+    @contextmanager
+    def phase(self,name):
+        '''Adds the time spent in the with block to a phase'''
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name,0.0) + time.monotonic() - start
+
+
+class RunStats:
+    '''Totals of a playlist, channel or batch run'''
+
+    def __init__(self,run_id,kind,url):
+        self.id = run_id
+        self.kind = kind
+        self.url = url
+        self.started = time.monotonic()
+        self.videos = 0
+        self.failed = 0
+        self.bytes = 0
+        self.retries = 0
+        self.phases = {}
+
+
+def rate(amount,seconds):
+    '''Returns amount per second, 0 for runs too short to measure'''  #Docstring
+    return amount / seconds if seconds > 0 else 0.0
+
+
+class Metrics:
+    '''Process-wide registry of download statistics, safe to share between worker threads'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_ids = itertools.count(1)
+        self._log = None
+        self.videos = {"ok": 0,"failed": 0}
+        self.bytes = 0  #Bytes of finished downloads.
+        self.retries = 0
+        self.phases = {phase: {"count": 0,"sum": 0.0,"max": 0.0} for phase in PHASES}
+        self.runs = {}  #Maps kind -> number of finished runs.
+        self.recent = deque(maxlen=RECENT_VIDEOS)   #Latest finished videos, newest last.
+        self.active_runs = {}   #Maps run id -> RunStats of the runs in progress.
+        self._transferred = 0   #Bytes read from media connections, also of unfinished downloads.
+        self._samples = deque(maxlen=4096)  #(time,transferred) pairs for the live throughput.
+
+    def start_video(self,url,run=None):
+        '''Returns the VideoStats a download fills in'''
+        return VideoStats(url,run)
+
+    def finish_video(self,video,success,message):
+        '''Adds a finished download to the totals, its run and the JSON log'''
+        seconds = time.monotonic() - video.started
+        record = {"event": "video","time": time.time(),"url": video.url,"success": success,"message": message,
+                  "seconds": round(seconds,3),"phases": {name: round(value,3) for name,value in video.phases.items()},
+                  "bytes": video.bytes,"bytes_per_sec": round(rate(video.bytes,video.phases.get("transfer",0.0))),
+                  "retries": video.retries,"run": video.run.id if video.run else None}
+        with self._lock:
+            self.videos["ok" if success else "failed"] += 1
+            self.bytes += video.bytes
+            self.retries += video.retries
+            for name,value in video.phases.items():
+                summary = self.phases.setdefault(name,{"count": 0,"sum": 0.0,"max": 0.0})
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["max"] = max(summary["max"],value)
+            self.recent.append(record)
+            if video.run is not None:
+                run = video.run
+                run.videos += 1
+                run.failed += not success
+                run.bytes += video.bytes
+                run.retries += video.retries
+                for name,value in video.phases.items():
+                    run.phases[name] = run.phases.get(name,0.0) + value
+            self._write(record)
+
+    def start_run(self,kind,url):
+        '''Returns the RunStats the videos of a playlist, channel or batch run add up into'''
+        with self._lock:
+            run = RunStats(next(self._run_ids),kind,url)
+            self.active_runs[run.id] = run
+        return run
+
+    def finish_run(self,run):
+        '''Logs a finished run, however it ended'''
+        seconds = time.monotonic() - run.started
+        with self._lock:
+            self.active_runs.pop(run.id,None)
+            self.runs[run.kind] = self.runs.get(run.kind,0) + 1
+            self._write({"event": "run","time": time.time(),"id": run.id,"kind": run.kind,"url": run.url,
+                         "seconds": round(seconds,3),"videos": run.videos,"failed": run.failed,"bytes": run.bytes,
+                         "bytes_per_sec": round(rate(run.bytes,seconds)),"retries": run.retries,
+                         "phases": {name: round(value,3) for name,value in run.phases.items()}})
+
+    def count_bytes(self,amount):
+        '''Counts bytes read from a media connection, for the live throughput'''
+        with self._lock:
+            self._transferred += amount
+            self._samples.append((time.monotonic(),self._transferred))
+
+    def throughput(self,window=THROUGHPUT_WINDOW):
+        '''Returns the bytes per second read over the last window seconds'''
+        now = time.monotonic()
+        with self._lock:
+            baseline = None     #Bytes already transferred when the window started.
+            for moment,transferred in reversed(self._samples):
+                if now - moment > window:
+                    baseline = transferred
+                    break
+            if baseline is None:    #Every sample is recent; if some were dropped the oldest kept one is the best guess.
+                baseline = self._samples[0][1] if len(self._samples) == self._samples.maxlen else 0
+            return rate(self._transferred - baseline,window)
+
+    def snapshot(self):
+        '''Returns every statistic as a dictionary, for the GUI and tools'''
+        throughput = self.throughput()
+        with self._lock:
+            return {"videos": dict(self.videos),"bytes": self.bytes,"retries": self.retries,"throughput": throughput,
+                    "transferred": self._transferred,"runs": dict(self.runs),
+                    "phases": {name: dict(summary,avg=summary["sum"] / summary["count"] if summary["count"] else 0.0)\
+                               for name,summary in self.phases.items()},
+                    "active_runs": [{"id": run.id,"kind": run.kind,"url": run.url,"videos": run.videos,"failed": run.failed,"bytes": run.bytes,\
+                                     "seconds": time.monotonic() - run.started} for run in self.active_runs.values()],
+                    "recent": list(self.recent)}
+
+    def prometheus_text(self):
+        '''Returns the statistics in the Prometheus text exposition format'''
+        from .segmented import default_pool    #Imported here: segmented reports its bytes to this module.
+        snapshot = self.snapshot()
+        connections = default_pool.stats()
+        lines = ["# HELP youtube_downloader_videos_total Finished video downloads by result.",
+                 "# TYPE youtube_downloader_videos_total counter"]
+        lines += [f'youtube_downloader_videos_total{{result="{result}"}} {count}' for result,count in snapshot["videos"].items()]
+        lines += ["# HELP youtube_downloader_runs_total Finished playlist, channel and batch runs.",
+                  "# TYPE youtube_downloader_runs_total counter"]
+        lines += [f'youtube_downloader_runs_total{{kind="{kind}"}} {count}' for kind,count in snapshot["runs"].items()]
+        lines += ["# HELP youtube_downloader_bytes_total Bytes read from media connections.",
+                  "# TYPE youtube_downloader_bytes_total counter",
+                  f"youtube_downloader_bytes_total {snapshot['transferred']}",
+                  "# HELP youtube_downloader_retries_total Download attempts repeated after a retryable error.",
+                  "# TYPE youtube_downloader_retries_total counter",
+                  f"youtube_downloader_retries_total {snapshot['retries']}",
+                  f"# HELP youtube_downloader_throughput_bytes_per_second Bytes per second over the last {THROUGHPUT_WINDOW:g} seconds.",
+                  "# TYPE youtube_downloader_throughput_bytes_per_second gauge",
+                  f"youtube_downloader_throughput_bytes_per_second {snapshot['throughput']:.1f}",
+                  "# HELP youtube_downloader_phase_seconds Time spent per phase of a video download.",
+                  "# TYPE youtube_downloader_phase_seconds summary"]
+        for name,summary in snapshot["phases"].items():
+            lines.append(f'youtube_downloader_phase_seconds_sum{{phase="{name}"}} {summary["sum"]:.6f}')
+            lines.append(f'youtube_downloader_phase_seconds_count{{phase="{name}"}} {summary["count"]}')
+        lines += ["# HELP youtube_downloader_http_requests_total HTTP requests sent through the connection pool.",
+                  "# TYPE youtube_downloader_http_requests_total counter",
+                  f"youtube_downloader_http_requests_total {connections['requests']}",
+                  "# HELP youtube_downloader_http_connections_opened_total New HTTP connections opened.",
+                  "# TYPE youtube_downloader_http_connections_opened_total counter",
+                  f"youtube_downloader_http_connections_opened_total {connections['connections_opened']}"]
+        return "\n".join(lines) + "\n"
+
+    def enable_json_log(self,path):
+        '''Appends one JSON line per finished video and run to path'''
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = open(path,"a",encoding="utf-8")
+
+    def _write(self,record):
+        '''Writes a record to the JSON log, if enabled (lock held)'''
+        if self._log is not None:
+            self._log.write(json.dumps(record,ensure_ascii=False) + "\n")
+            self._log.flush()   #A crash must not lose the lines that explain it.
+
+
+metrics = Metrics()     #Shared by the GUI, the command line and every download thread.
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    '''Answers GET /metrics with the Prometheus text'''
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/","/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type","text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length",str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self,format,*args):
+        pass    #Scrapes every few seconds would flood stderr.
+
+
+def serve_prometheus(port=DEFAULT_PORT,host="127.0.0.1"):
+    '''Serves /metrics on a background thread and returns the server (call shutdown() to stop it)'''  #Docstring
+    server = http.server.ThreadingHTTPServer((host,port),_MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever,name="metrics-endpoint",daemon=True).start()
+    return server
@@ -0,0 +1,67 @@
+'''Thread-safe, throttled delivery of progress events to a GUI thread.
+
+Tk widgets may only be touched from the thread running the mainloop, and a
+fast download reports thousands of chunks per second. Worker threads therefore
+only push small tuples onto a queue; the GUI drains it a fixed number of times
+per second, keeps just the latest event of every task, and applies those.
+'''
+
+import queue
+
+
+FRAME_RATE = 30     #Times per second the GUI applies pending events.
+
+_PROGRESS = 0   #Event kinds: coalesced progress updates and ordered calls.
+_CALL = 1
+
+
+class ProgressPipeline:
+    '''Queue of events pushed by worker threads and applied on the GUI thread by drain()'''
+
+    def __init__(self):
+        self._events = queue.SimpleQueue()
+
+    def reporter(self,on_update):
+        '''Returns a cheap callback for worker threads; on_update(*values) later runs on the GUI thread.
+
+        Updates sent through the same reporter are coalesced, only the latest
+        one of each frame reaches on_update.
+        '''
+        put = self._events.put
+        return lambda *values: put((_PROGRESS,on_update,values))
+
+    def call(self,func,*args):
+        '''Runs func(*args) on the GUI thread, in the order the calls were made'''
+        self._events.put((_CALL,func,args))
+
+    def drain(self):
+        '''Applies every pending event; must be called from the GUI thread'''
+        latest = {}     #Maps on_update -> its most recent values.
+        calls = []
+        while True:
+            try:
+                kind,target,values = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == _PROGRESS:
+                latest[target] = values
+            else:
+                calls.append((target,values))
+
+        for on_update,values in latest.items():
+            on_update(*values)
+        for func,args in calls:     #Status messages run after the progress of the same frame.
+            func(*args)
+
+
+def schedule_drain(widget,pipeline,frame_rate=FRAME_RATE):
+    '''Drains the pipeline frame_rate times per second using the widget's after() timer'''  #Docstring
+    interval = max(1,int(1000 / frame_rate))
+
+    def tick():
+        try:
+            pipeline.drain()
+        finally:
+            widget.after(interval,tick)     #Keep pumping even if one event raised.
+
+    widget.after(interval,tick)
@@ -0,0 +1,88 @@
+'''Token bucket rate limiting shared by worker threads.
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per second.
+acquire(n) takes n tokens, sleeping until enough have accumulated, so any
+number of threads sharing one bucket stay under the rate together.
+
+Two process-wide buckets govern every download: `bandwidth` (bytes per second,
+taken for every chunk read from a media connection) and `request_rate` (requests
+per second, taken for every page and API request pytubefix makes). A job can
+carry a bucket of its own on top of them, see throttle().
+'''
+
+import re
+import threading
+import time
+
+
+class TokenBucket:
+    '''Thread-safe token bucket; a rate of None or 0 means unlimited'''
+
+    def __init__(self,rate=None,burst=None):
+        self._condition = threading.Condition()  #Notified by set_rate(), so waiting threads recompute their delay.
+        self.rate = None
+        self._tokens = 0    #A new bucket starts empty rather than full, so short runs are not a burst above the rate.
+        self._updated = time.monotonic()
+        self.set_rate(rate,burst)
+
+    def set_rate(self,rate,burst=None):
+        '''Changes the rate (tokens per second) and burst size at runtime, also for threads already waiting'''
+        with self._condition:
+            now = time.monotonic()
+            if self.rate is not None:   #Tokens earned at the old rate are kept.
+                self._tokens = min(self.burst,self._tokens + (now - self._updated) * self.rate)
+            self.rate = rate if rate and rate > 0 else None
+            self.burst = burst or (self.rate or 0)   #By default one second worth of tokens.
+            self._tokens = min(self._tokens,self.burst)
+            self._updated = now
+            self._condition.notify_all()
+
+    def acquire(self,tokens=1):
+        '''Takes tokens, waiting as long as needed; returns the seconds waited'''
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                if self.rate is None:
+                    return time.monotonic() - start
+                now = time.monotonic()
+                self._tokens = min(self.burst,self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                #A request larger than the bucket may go once the bucket is full, or it would never fit.
+                needed = min(tokens,self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= tokens  #May go negative, later callers then wait for the debt.
+                    return time.monotonic() - start
+                #Released while waiting; a new rate wakes the wait early and the delay is computed again.
+                self._condition.wait((needed - self._tokens) / self.rate)
+
+
+bandwidth = TokenBucket()   #Bytes per second over every download of the process.
+request_rate = TokenBucket()    #Page and API requests per second to YouTube.
+
+UNITS = {"": 1,"k": 1024,"m": 1024 ** 2,"g": 1024 ** 3}
+
+
+def parse_rate(text):
+    '''Returns the bytes per second of "500K", "2.5M" or "1048576" style values, or None for "", "0" or "none"'''  #Docstring
+    text = str(text or "").strip().lower().replace("/s","").rstrip("b").replace("i","")
+    if text in ("","0","none","off","unlimited"):
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([kmg]?)",text)
+    if not match:
+        raise ValueError(f"Invalid rate: {text!r}, use e.g. 500K or 2M")
+    return float(match.group(1)) * UNITS[match.group(2)] or None
+
+
+def set_limits(bandwidth_limit=False,request_limit=False):
+    '''Changes the global limits at runtime; None lifts a limit, False leaves it as it is'''  #Docstring
+    if bandwidth_limit is not False:
+        bandwidth.set_rate(bandwidth_limit)
+    if request_limit is not False:
+        request_rate.set_rate(request_limit)
+
+
+def throttle(amount,limiter=None):
+    '''Waits until amount bytes may be downloaded under the global limit and the job's own limiter'''  #Docstring
+    bandwidth.acquire(amount)
+    if limiter is not None:
+        limiter.acquire(amount)
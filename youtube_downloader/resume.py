@@ -0,0 +1,121 @@
+'''On-disk state of unfinished downloads so that they can be resumed.
+
+While a stream downloads, its bytes go to "<file>.part" and a small sidecar
+"<file>.part.json" records which byte ranges of it are already written. A
+restarted download only fetches the missing ranges, and once everything is
+written the .part file is renamed to its final name and the sidecar removed.
+'''
+
+import json
+import os
+import threading
+import time
+
+
+PART_SUFFIX = ".part"
+MANIFEST_SUFFIX = ".part.json"
+SAVE_INTERVAL = 1.0     #Seconds between sidecar writes while downloading.
+
+
+def merge_ranges(ranges):
+    '''Merges overlapping or touching inclusive (start,end) ranges'''  #Docstring
+    merged = []
+    for start,end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1],end)
+        else:
+            merged.append([start,end])
+    return merged
+
+
+def is_complete(path,total_size):
+    '''Checks if path is a finished download of total_size bytes'''  #Docstring
+    if os.path.exists(path + MANIFEST_SUFFIX):  #A sidecar means the file was never finished.
+        return False
+    return os.path.isfile(path) and os.path.getsize(path) == total_size
+
+
+class PartialDownload:
+    '''The .part data file of a download and the byte ranges already written to it'''
+
+    def __init__(self,path,total_size,key=None):
+        self.path = path    #Final name of the file once complete.
+        self.part_path = path + PART_SUFFIX
+        self.manifest_path = path + MANIFEST_SUFFIX
+        self.total_size = total_size
+        self.key = key  #Identifies the stream (e.g. its itag) so a different stream never resumes this one.
+        self.completed = []     #Merged list of [start,end] ranges already on disk.
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    def load(self):
+        '''Reads the sidecar and keeps its ranges only if they belong to this same stream'''
+        try:
+            with open(self.manifest_path,encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError,ValueError):
+            manifest = None
+
+        valid = bool(manifest) and manifest.get("total_size") == self.total_size and manifest.get("key") == self.key\
+                and os.path.isfile(self.part_path) and os.path.getsize(self.part_path) == self.total_size
+        self.completed = merge_ranges(manifest["completed"]) if valid else []
+        return self
+
+    def prepare(self):
+        '''Creates the .part file at its full size unless a resumable one already exists'''
+        if not self.completed:
+            with open(self.part_path,"wb") as file:
+                file.truncate(self.total_size)  #Preallocate so ranges can be written at their offsets.
+        self.save()
+
+    def bytes_done(self):
+        '''Returns the number of bytes already written'''
+        with self._lock:
+            return sum(end - start + 1 for start,end in self.completed)
+
+    def missing_ranges(self):
+        '''Returns the inclusive (start,end) ranges that still need to be downloaded'''
+        missing = []
+        position = 0
+        with self._lock:
+            for start,end in self.completed:
+                if start > position:
+                    missing.append((position,start - 1))
+                position = end + 1
+        if position < self.total_size:
+            missing.append((position,self.total_size - 1))
+        return missing
+
+    def add(self,start,end):
+        '''Records that bytes start..end are written, saving the sidecar every SAVE_INTERVAL'''
+        with self._lock:
+            self.completed = merge_ranges(self.completed + [[start,end]])
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def save(self):
+        '''Writes the sidecar atomically so a crash never leaves it half written'''
+        with self._lock:
+            manifest = {"key": self.key,"total_size": self.total_size,"completed": self.completed}
+            temp_path = self.manifest_path + ".tmp"
+            with open(temp_path,"w",encoding="utf-8") as file:
+                json.dump(manifest,file)
+            os.replace(temp_path,self.manifest_path)
+            self._last_save = time.monotonic()
+
+    def finish(self):
+        '''Moves the .part file to its final name and removes the sidecar'''
+        os.replace(self.part_path,self.path)
+        try:
+            os.remove(self.manifest_path)
+        except FileNotFoundError:
+            pass
+
+    def discard(self):
+        '''Removes the .part file and its sidecar'''
+        for leftover in (self.part_path,self.manifest_path):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,91 @@
+'''Retrying failed downloads: error classification, jittered backoff and a report.
+
+Errors are either retryable (connection resets, timeouts, HTTP 429/5xx, a media
+connection closing early or answering 403 because its signed URL expired) or
+terminal (invalid URL, age restricted, unavailable, and anything unexpected).
+A retryable error is retried after an exponentially growing, fully jittered
+delay so that workers hit by the same outage do not all come back at once.
+Retries resume from the .part file, so bytes already written are not fetched again.
+'''
+
+import http.client
+import random
+import socket
+import threading
+from urllib.error import HTTPError,URLError
+
+from pytubefix.exceptions import MaxRetriesExceeded,RegexMatchError,VideoUnavailable
+
+from .segmented import RangeNotSupported,SegmentedDownloadError
+
+
+DEFAULT_RETRIES = 3     #Extra attempts after the first one.
+BACKOFF_BASE = 1.0      #Seconds; the delay before retry n is random up to BACKOFF_BASE * 2**n.
+BACKOFF_CAP = 30.0
+RETRYABLE_STATUS = (408,425,429,500,502,503,504)
+MEDIA_RETRYABLE_STATUS = RETRYABLE_STATUS + (403,)  #Stream URLs expire; a fresh lookup gives new ones.
+
+
+def classify(error):
+    '''Returns "retryable" or "terminal" for an exception raised while downloading'''  #Docstring
+    if isinstance(error,(RegexMatchError,VideoUnavailable)):   #Also age restricted, private, members only...
+        return "terminal"
+    if isinstance(error,HTTPError):     #Before URLError, which it subclasses.
+        return "retryable" if error.code in RETRYABLE_STATUS else "terminal"
+    if isinstance(error,RangeNotSupported):
+        return "terminal"
+    if isinstance(error,SegmentedDownloadError) and error.__cause__ is not None:
+        return classify(error.__cause__)    #A socket or disk error that stopped one of the ranges.
+    if isinstance(error,SegmentedDownloadError):
+        return "retryable" if error.status is None or error.status in MEDIA_RETRYABLE_STATUS else "terminal"
+    if isinstance(error,(URLError,ConnectionError,TimeoutError,socket.timeout,http.client.HTTPException,MaxRetriesExceeded)):
+        return "retryable"
+    return "terminal"
+
+
+def backoff_delay(attempt,base=BACKOFF_BASE,cap=BACKOFF_CAP):
+    '''Returns the seconds to wait before retry number attempt (0 for the first), with full jitter'''  #Docstring
+    return random.uniform(0,min(cap,base * 2 ** attempt))
+
+
+class RetryReport:
+    '''Counts what the retries of a run did, safe to share between worker threads'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0    #Attempts made after a retryable error.
+        self.recovered = []     #URLs that succeeded after at least one retry.
+        self.exhausted = []     #URLs that kept failing with retryable errors.
+        self.terminal = {}  #Maps error type name -> number of videos that failed with it.
+
+    def retried(self,url,error):
+        '''Records one more attempt of url after error'''
+        with self._lock:
+            self.retries += 1
+
+    def finished(self,url,attempts,error=None):
+        '''Records how a video ended: attempts made and the error it failed with, if any'''
+        with self._lock:
+            if error is None:
+                if attempts > 1:
+                    self.recovered.append(url)
+            elif classify(error) == "retryable":
+                self.exhausted.append(url)
+            else:
+                name = type(error).__name__
+                self.terminal[name] = self.terminal.get(name,0) + 1
+
+    def summary(self):
+        '''Returns a short text such as ", 5 retries (3 recovered, 1 gave up)", or "" if nothing was retried'''
+        with self._lock:
+            if not self.retries:
+                return ""
+            parts = [f"{len(self.recovered)} recovered"]
+            if self.exhausted:
+                parts.append(f"{len(self.exhausted)} gave up")
+            return f", {self.retries} retries ({', '.join(parts)})"
+
+    def as_dict(self):
+        '''Returns the counters and URLs for logs and tools'''
+        with self._lock:
+            return {"retries": self.retries,"recovered": list(self.recovered),"exhausted": list(self.exhausted),"terminal": dict(self.terminal)}
@@ -0,0 +1,262 @@
+'''Segmented (multi-connection) download of a single stream.
+
+The file is split into byte ranges which are fetched in parallel with HTTP
+Range requests. Every range is written straight into its offset of a .part file
+that was preallocated to the full size, so no temporary pieces need to be
+joined. The ranges already written are tracked by resume.PartialDownload, so an
+interrupted download continues where it stopped.
+'''
+
+import http.client     #Plain HTTP/1.1 connections that can be kept alive and reused.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin,urlsplit
+
+from .metrics import metrics
+from .ratelimit import throttle
+from .resume import PartialDownload
+
+
+DEFAULT_SEGMENTS = 8    #Number of byte ranges fetched at the same time.
+MIN_SEGMENT_SIZE = 1024 * 1024  #Never split a file into ranges smaller than 1 MiB.
+CHUNK_SIZE = 256 * 1024     #Bytes read from the socket and written to disk at a time.
+MAX_REDIRECTS = 5
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "accept-language": "en-US,en"}  #Same headers pytubefix sends.
+
+
+class SegmentedDownloadError(Exception):
+    '''Raised when a segmented download cannot be completed; status is the HTTP status behind it, if any'''
+
+    def __init__(self,message,status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RangeNotSupported(SegmentedDownloadError):
+    '''Raised when the server ignores Range requests'''
+
+
+class _Cancelled(Exception):
+    '''Stops a range early because another range already failed'''
+
+
+class ConnectionPool:
+    '''Keeps idle keep-alive connections per host so that ranges reuse them'''
+
+    def __init__(self,timeout=30,max_idle_per_host=16):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}     #Maps (scheme,host) -> list of idle connections.
+        self._lock = threading.Lock()
+        self.requests = 0   #Connections handed out by acquire(), one per request.
+        self.opened = 0     #New connections, each paying a TCP (and TLS) handshake.
+
+    def acquire(self,scheme,netloc):
+        '''Returns an idle connection to the host or opens a new one'''
+        with self._lock:
+            self.requests += 1
+            idle = self._idle.get((scheme,netloc))
+            if idle:
+                return idle.pop()
+        return self.new_connection(scheme,netloc)
+
+    def count_request(self):
+        '''Counts a request sent outside the pool'''
+        with self._lock:
+            self.requests += 1
+
+    def new_connection(self,scheme,netloc):
+        '''Opens a new connection to the host, bypassing the idle ones'''
+        with self._lock:
+            self.opened += 1
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(netloc,timeout=self.timeout)
+
+    def release(self,scheme,netloc,connection):
+        '''Gives a connection whose response was fully read back to the pool'''
+        with self._lock:
+            idle = self._idle.setdefault((scheme,netloc),[])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def stats(self):
+        '''Returns the request and connection counters; "reused" requests skipped the handshake'''
+        with self._lock:
+            return {"requests": self.requests,"connections_opened": self.opened,"reused": max(0,self.requests - self.opened),
+                    "idle": sum(len(connections) for connections in self._idle.values())}
+
+    def close(self):
+        '''Closes every idle connection'''
+        with self._lock:
+            idle,self._idle = self._idle,{}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+default_pool = ConnectionPool()     #Shared by every download of the process.
+
+
+def split_ranges(total_size,segments=DEFAULT_SEGMENTS,min_segment_size=MIN_SEGMENT_SIZE):
+    '''Splits total_size bytes into at most `segments` inclusive (start,end) ranges'''  #Docstring
+    if total_size <= 0:
+        return []
+    return split_missing([(0,total_size - 1)],segments,min_segment_size)
+
+
+def split_missing(missing,segments=DEFAULT_SEGMENTS,min_segment_size=MIN_SEGMENT_SIZE,align=1):
+    '''Splits the missing inclusive (start,end) spans into about `segments` ranges of similar size.
+
+    Ranges are cut at byte offsets that are multiples of align, so every block of
+    align bytes (a hashed piece) that is missing as a whole is fetched by one range.
+    '''
+    remaining = sum(end - start + 1 for start,end in missing)
+    if remaining <= 0:
+        return []
+    segment_size = max(min_segment_size,-(-remaining // max(1,int(segments))))   #-(-a // b) rounds up.
+    segment_size = -(-segment_size // align) * align
+    ranges = []
+    for span_start,span_end in missing:
+        start = span_start
+        while start <= span_end:
+            end = min((start + segment_size) // align * align - 1,span_end)
+            ranges.append((start,end))
+            start = end + 1
+    return ranges
+
+
+def open_range(url,start,end,pool=default_pool,headers=None):
+    '''Sends a Range request and returns (scheme,netloc,connection,response), following redirects'''
+    request_headers = dict(DEFAULT_HEADERS,**(headers or {}))
+    request_headers["Range"] = f"bytes={start}-{end}"
+
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        connection = pool.acquire(parts.scheme,parts.netloc)
+        try:
+            connection.request("GET",path,headers=request_headers)
+            response = connection.getresponse()
+        except (OSError,http.client.HTTPException):
+            #An idle connection may have been dropped by the server meanwhile, so try once more on a fresh one.
+            connection.close()
+            connection = pool.new_connection(parts.scheme,parts.netloc)
+            connection.request("GET",path,headers=request_headers)
+            response = connection.getresponse()
+
+        if response.status in (301,302,303,307,308):    #Media hosts often redirect to another server.
+            location = response.getheader("Location")
+            response.read()
+            pool.release(parts.scheme,parts.netloc,connection)
+            if not location:
+                raise SegmentedDownloadError(f"HTTP {response.status} without a Location header")
+            url = urljoin(url,location)
+            continue
+
+        return parts.scheme,parts.netloc,connection,response
+
+    raise SegmentedDownloadError("Too many redirects")
+
+
+def segmented_download(url,path,total_size,segments=DEFAULT_SEGMENTS,progress_callback=None,pool=default_pool,headers=None,key=None,limiter=None,hasher=None):
+    '''Downloads url into path using parallel byte ranges, resuming a previous .part file, and returns the path.
+
+    Every chunk is paced by the global bandwidth limit and, if given, by limiter
+    (a ratelimit.TokenBucket shared by the ranges and whatever else the job downloads).
+    hasher (an integrity.InlineHasher) is given every chunk as it is written.
+    '''  #Docstring
+
+    #Pick up the ranges a previous attempt already wrote, if it was the same stream.
+    state = PartialDownload(path,total_size,key=key).load()
+    state.prepare()
+    ranges = split_missing(state.missing_ranges(),segments,align=hasher.piece_size if hasher else 1)    #One range per piece keeps it hashable inline.
+
+    lock = threading.Lock()
+    failed = threading.Event()  #Set by the first range that fails so the others stop early.
+    bytes_downloaded = state.bytes_done()
+    if progress_callback and bytes_downloaded:
+        progress_callback(bytes_downloaded,total_size)
+
+    def report(amount):
+        nonlocal bytes_downloaded
+        with lock:
+            bytes_downloaded += amount
+            if progress_callback:
+                progress_callback(bytes_downloaded,total_size)
+
+    def fetch_range(start,end):
+        '''Fetches one byte range and writes it at its offset in the .part file'''
+        scheme,netloc,connection,response = open_range(url,start,end,pool=pool,headers=headers)
+        try:
+            whole_file = response.status == 200 and start == 0 and end == total_size - 1
+            if response.status == 200 and not whole_file:
+                raise RangeNotSupported("Server ignored the Range request")
+            if response.status != 206 and not whole_file:
+                raise SegmentedDownloadError(f"Server answered HTTP {response.status} to a Range request",status=response.status)
+
+            with open(state.part_path,"r+b") as file:  #Each range has its own handle, so seeks never interfere.
+                file.seek(start)
+                position = start
+                while position <= end:
+                    if failed.is_set():
+                        raise _Cancelled()
+                    chunk = response.read(min(CHUNK_SIZE,end - position + 1))
+                    if not chunk:
+                        raise SegmentedDownloadError(f"Connection closed at byte {position} of {total_size}")
+                    throttle(len(chunk),limiter)    #Slows the reads, so the server is held back by TCP flow control.
+                    metrics.count_bytes(len(chunk))
+                    file.write(chunk)
+                    if hasher is not None:
+                        hasher.update(position,chunk)   #Hashed while still in memory: no second pass over the file.
+                    file.flush()    #Bytes must reach the file before the sidecar claims them.
+                    state.add(position,position + len(chunk) - 1)
+                    position += len(chunk)
+                    report(len(chunk))
+        except BaseException:
+            failed.set()
+            connection.close()  #Half-read responses cannot be reused.
+            raise
+
+        pool.release(scheme,netloc,connection)
+
+    with ThreadPoolExecutor(max_workers=max(1,len(ranges))) as executor:
+        futures = [executor.submit(fetch_range,start,end) for start,end in ranges]
+
+    #Report the range that actually failed, not the ones that were cancelled because of it.
+    errors = [future.exception() for future in futures if future.exception() and not isinstance(future.exception(),_Cancelled)]
+    if errors:
+        state.save()    #Keep everything written so far for the next attempt.
+        if isinstance(errors[0],SegmentedDownloadError):
+            raise errors[0]
+        raise SegmentedDownloadError(f"{errors[0]}") from errors[0]
+
+    state.finish()
+    return path
+
+
+def stream_chunks(url,total_size,pool=default_pool,headers=None,limiter=None):
+    '''Yields the bytes of url in order over a single connection, for consumers that need a stream'''  #Docstring
+    if total_size <= 0:
+        return
+    scheme,netloc,connection,response = open_range(url,0,total_size - 1,pool=pool,headers=headers)
+    try:
+        if response.status not in (200,206):
+            raise SegmentedDownloadError(f"Server answered HTTP {response.status}",status=response.status)
+        position = 0
+        while position < total_size:
+            chunk = response.read(min(CHUNK_SIZE,total_size - position))
+            if not chunk:
+                raise SegmentedDownloadError(f"Connection closed at byte {position} of {total_size}")
+            throttle(len(chunk),limiter)
+            metrics.count_bytes(len(chunk))
+            position += len(chunk)
+            yield chunk
+    except BaseException:
+        connection.close()  #Half-read responses cannot be reused.
+        raise
+    pool.release(scheme,netloc,connection)
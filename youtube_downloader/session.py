@@ -0,0 +1,238 @@
+'''Pooled keep-alive HTTP for every request pytubefix makes.
+
+pytubefix sends each request (watch pages, player API calls, playlist pages,
+stream sizes, sequential media) through urllib's urlopen, which opens and
+closes a new connection every time, so a playlist pays the TCP and TLS setup
+hundreds of times. install() swaps pytubefix.request._execute_request for a
+version that borrows connections from the same ConnectionPool the segmented
+downloads use, so metadata and media requests all reuse warm connections.
+
+Every request first takes a token from ratelimit.request_rate, so a request rate
+limit holds across all threads.
+
+If the optional httpx package with HTTP/2 support is installed, install(http2=True)
+sends the pytubefix requests over one multiplexed HTTP/2 connection per host instead.
+When a proxy is configured in the environment the original urlopen is used.
+'''
+
+import http.client
+import io
+import json
+import socket
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urljoin,urlsplit
+from urllib.request import getproxies
+
+from pytubefix import request as pytubefix_request
+
+from .ratelimit import request_rate
+from .segmented import DEFAULT_HEADERS,MAX_REDIRECTS,default_pool
+
+try:
+    import httpx    #Optional: only needed for HTTP/2.
+except ImportError:
+    httpx = None
+
+
+DRAIN_LIMIT = 64 * 1024     #Unread bodies up to this size are read so their connection is reused; larger ones close it.
+
+_original_execute_request = pytubefix_request._execute_request
+_http2_client = None
+_lock = threading.Lock()
+
+
+class PooledResponse:
+    '''urlopen-like response that hands its connection back to the pool once the body was read.
+
+    A response dropped with its body unread, or whose headers are all the caller
+    wants, must not keep its connection checked out: close() reads a short rest
+    of the body ahead so the connection goes back to the pool, and closes the
+    connection of a long one. It also runs when the response is garbage collected.
+    '''
+
+    def __init__(self,url,pool,scheme,netloc,connection,response):
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.msg
+        self._pool = pool
+        self._key = (scheme,netloc)
+        self._connection = connection
+        self._response = response
+        self._body_read = False     #True once the caller read any of the body.
+        self._buffer = None     #The body, once close() read it ahead.
+
+    def read(self,amt=None):
+        self._body_read = True
+        if self._buffer is not None:
+            return self._buffer.read(amt) if amt is not None else self._buffer.read()
+        data = self._response.read(amt)
+        if self._connection is not None and self._response.isclosed():    #Body fully read.
+            if self._response.will_close:
+                self._connection.close()
+            else:
+                self._pool.release(*self._key,self._connection)
+            self._connection = None
+        return data
+
+    def info(self):
+        '''Returns the headers; pytubefix calls it only when it wants nothing else (head(), the size probe of stream())'''
+        if not self._body_read:
+            self.close()    #A short body stays readable from the read-ahead buffer.
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        '''Gives the connection back (short rest of the body, read ahead) or closes it (long or unknown rest)'''
+        if self._connection is None:
+            return
+        remaining = self._response.length   #None for a chunked body.
+        if not self._response.will_close and remaining is not None and remaining <= DRAIN_LIMIT:
+            try:
+                self._buffer = io.BytesIO(self._response.read())
+                self._pool.release(*self._key,self._connection)
+                self._connection = None
+                return
+            except (OSError,http.client.HTTPException):
+                pass
+        self._response.close()
+        self._connection.close()
+        self._connection = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:   #Also runs at interpreter exit, when the modules may be gone.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+
+class Http2Response:
+    '''urlopen-like view of an httpx response'''
+
+    def __init__(self,response):
+        self.url = str(response.url)
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers     #Case-insensitive mapping, like urllib's.
+        self._content = response.content
+        self._offset = 0
+
+    def read(self,amt=None):
+        end = len(self._content) if amt is None else self._offset + amt
+        data = self._content[self._offset:end]
+        self._offset += len(data)
+        return data
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def close(self):
+        pass
+
+
+def _send(pool,method,url,headers,data,timeout):
+    '''Sends one request over a pooled connection, following redirects like urlopen'''
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        connection = pool.acquire(parts.scheme,parts.netloc)
+        if isinstance(timeout,(int,float)):
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+        try:
+            connection.request(method,path,body=data,headers=headers)
+            response = connection.getresponse()
+        except (OSError,http.client.HTTPException):
+            #An idle connection may have been dropped by the server meanwhile, so try once more on a fresh one.
+            connection.close()
+            connection = pool.new_connection(parts.scheme,parts.netloc)
+            connection.request(method,path,body=data,headers=headers)
+            response = connection.getresponse()
+
+        pooled = PooledResponse(url,pool,parts.scheme,parts.netloc,connection,response)
+        if method == "HEAD":
+            pooled.read()   #No body, give the connection back right away.
+
+        if response.status in (301,302,303,307,308) and response.getheader("Location"):
+            pooled.read()
+            url = urljoin(url,response.getheader("Location"))
+            if response.status == 303 or (response.status in (301,302) and method == "POST"):
+                method,data = "GET",None    #Same rewrite urllib does.
+            continue
+
+        if response.status >= 400:  #urlopen raises for errors and pytubefix relies on that.
+            raise HTTPError(url,response.status,response.reason,response.msg,io.BytesIO(pooled.read()))
+        return pooled
+
+    raise HTTPError(url,310,"Too many redirects",None,None)
+
+
+def _send_http2(method,url,headers,data,timeout):
+    '''Sends one request over the shared HTTP/2 client'''
+    response = _http2_client.request(method,url,headers=headers,content=data,follow_redirects=True,\
+                                     timeout=timeout if isinstance(timeout,(int,float)) else httpx.USE_CLIENT_DEFAULT)
+    default_pool.count_request()    #httpx manages its own connections, only the request is counted.
+    if response.status_code >= 400:
+        raise HTTPError(url,response.status_code,response.reason_phrase,response.headers,io.BytesIO(response.content))
+    return Http2Response(response)
+
+
+def pooled_execute_request(url,method=None,headers=None,data=None,timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+    '''Drop-in replacement for pytubefix.request._execute_request'''  #Docstring
+    if not url.lower().startswith("http"):
+        raise ValueError("Invalid URL")
+    request_rate.acquire()  #Global requests per second governor, unlimited unless set.
+    if getproxies():    #Honour proxy settings the way urlopen does.
+        return _original_execute_request(url,method=method,headers=headers,data=data,timeout=timeout)
+
+    request_headers = dict(DEFAULT_HEADERS,**(headers or {}))
+    if data and not isinstance(data,bytes):     #pytubefix passes JSON payloads as dictionaries.
+        data = bytes(json.dumps(data),encoding="utf-8")
+    method = method or ("POST" if data else "GET")
+
+    if _http2_client is not None:
+        return _send_http2(method,url,request_headers,data,timeout)
+    return _send(default_pool,method,url,request_headers,data,timeout)
+
+
+def install(http2=False):
+    '''Routes every pytubefix request through the shared pool; http2 needs httpx with h2 installed'''  #Docstring
+    global _http2_client
+    with _lock:
+        if http2 and _http2_client is None:
+            if httpx is None:
+                raise RuntimeError("HTTP/2 needs the httpx package: pip install httpx[http2]")
+            _http2_client = httpx.Client(http2=True,timeout=default_pool.timeout)
+        pytubefix_request._execute_request = pooled_execute_request
+
+
+def uninstall():
+    '''Restores pytubefix's own urlopen requests'''  #Docstring
+    global _http2_client
+    with _lock:
+        pytubefix_request._execute_request = _original_execute_request
+        if _http2_client is not None:
+            _http2_client.close()
+            _http2_client = None
+
+
+def connection_stats():
+    '''Returns how many requests were sent and how many of them reused a warm connection'''  #Docstring
+    return default_pool.stats()
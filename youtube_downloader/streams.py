@@ -0,0 +1,66 @@
+'''Stream selection: picks what to download for a requested resolution and format.
+
+YouTube only serves progressive (video+audio in one file) streams up to 360p or
+720p; everything else comes as separate video-only and audio-only "adaptive"
+streams. select_streams ranks both kinds against the request and returns either
+a single progressive stream or a video stream plus the audio stream to mux it with.
+'''
+
+import re
+from collections import namedtuple
+
+
+#audio is None when video is a progressive stream that already contains the sound.
+Selection = namedtuple("Selection","video audio")
+
+#Audio stream container preferred for each requested format: the one that goes with a video
+#container when muxing, or the one an audio format can be remuxed from without transcoding.
+AUDIO_SUBTYPES = {"mp4": ("mp4","m4a"), "webm": ("webm",), "m4a": ("mp4",), "opus": ("webm",), "mp3": ()}
+
+
+def parse_number(text):
+    '''Returns the leading number of "1080p"/"128kbps" style values, or 0'''  #Docstring
+    match = re.match(r"\d+",text or "")
+    return int(match.group()) if match else 0
+
+
+def best_audio(streams,format):
+    '''Returns the highest bitrate audio-only stream, preferring one that fits the container of format'''  #Docstring
+    audio = [stream for stream in streams if stream.includes_audio_track and not stream.includes_video_track]
+    if not audio:
+        return None
+    preferred = AUDIO_SUBTYPES.get(format,(format,))
+    return max(audio,key=lambda stream: (stream.subtype in preferred,parse_number(stream.abr)))
+
+
+def select_streams(streams,res,format,allow_mux=True):
+    '''Picks the streams to download for the requested resolution and format, or None.
+
+    Fallback policy, first match wins:
+      1. progressive stream at the requested resolution
+      2. adaptive video at the requested resolution + best audio (if allow_mux)
+      3. the closest lower resolution, then the closest higher one, using 1. and 2.
+    Only video streams in the requested container are considered, since they are
+    stream-copied into a file of that format: a 1080p webm stream is never picked
+    for an mp4 request, a lower mp4 resolution is. Within one resolution the
+    higher frame rate wins.
+    '''  #Docstring
+    streams = list(streams)
+    wanted = parse_number(res)
+    video = [stream for stream in streams if stream.includes_video_track and stream.subtype == format and stream.resolution]
+    audio = best_audio(streams,format) if allow_mux else None
+
+    #Every resolution on offer, closest lower ones first, then the higher ones.
+    heights = sorted({parse_number(stream.resolution) for stream in video})
+    order = sorted(heights,key=lambda height: (height > wanted,abs(height - wanted)))
+
+    for height in order:
+        at_height = [stream for stream in video if parse_number(stream.resolution) == height]
+        progressive = [stream for stream in at_height if stream.is_progressive]
+        if progressive:
+            return Selection(max(progressive,key=lambda stream: stream.fps or 0),None)
+        adaptive = [stream for stream in at_height if not stream.includes_audio_track]
+        if adaptive and audio:
+            return Selection(max(adaptive,key=lambda stream: stream.fps or 0),audio)
+
+    return None
@@ -0,0 +1,239 @@
+'''Thumbnail previews: fetched, decoded and resized on background threads, cached on disk and in memory.
+
+Fetching and decoding a JPEG on the GUI thread freezes the window for as long
+as the request takes, and a playlist shows many of them. ThumbnailCache does
+both on a thread pool and keeps two tiers, each bounded in size:
+
+- on disk, the image files as served, with the ETag they came with. A file is
+  used as is for FRESH_SECONDS, then revalidated with If-None-Match, so an
+  unchanged thumbnail costs a body-less 304 instead of a download;
+- in memory, the decoded images already shrunk to the size they are shown at,
+  keyed by URL, ETag and size, least recently used dropped first.
+
+Scrolling back to thumbnails seen before therefore neither fetches nor decodes
+them again. Several requests for the same image share one load. Pillow is
+needed (``pip install pillow``), as for the rest of the GUI.
+'''
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+from .session import pooled_execute_request
+from .urls import video_id
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+DEFAULT_FOLDER = os.path.join(os.path.expanduser("~"),".youtube_downloader_thumbnails")
+DEFAULT_MAX_DISK_BYTES = 64 * 2 ** 20
+DEFAULT_MAX_MEMORY_BYTES = 32 * 2 ** 20     #Decoded pixels kept in memory.
+DEFAULT_WORKERS = 6     #Thumbnails fetched and decoded at the same time.
+FRESH_SECONDS = 24 * 3600   #How long a file on disk is used without asking the server.
+RETRY_FAILED_SECONDS = 300  #A thumbnail that failed to load is not tried again for this long.
+SMALL_THUMBNAIL = "https://i.ytimg.com/vi/{}/mqdefault.jpg"     #320x180, a few KB: enough for list rows.
+
+
+def small_thumbnail_url(url):
+    '''Returns the URL of a video's small thumbnail, known without any lookup, or None'''  #Docstring
+    video = video_id(url)
+    return SMALL_THUMBNAIL.format(video) if video else None
+
+
+def decode(data,size):
+    '''Decodes image file bytes into an image shrunk to fit in size (width,height), keeping its aspect ratio'''  #Docstring
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail(size)   #Lets the JPEG decoder work at a reduced scale instead of decoding every pixel first.
+    if image.mode not in ("RGB","RGBA"):
+        image = image.convert("RGB")
+    return image
+
+
+class ThumbnailCache:
+    '''Loads thumbnails on a thread pool through a disk tier of files and a memory tier of decoded images'''
+
+    def __init__(self,folder=DEFAULT_FOLDER,max_disk_bytes=DEFAULT_MAX_DISK_BYTES,max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,\
+                 workers=DEFAULT_WORKERS,fresh_seconds=FRESH_SECONDS):
+        if Image is None:
+            raise RuntimeError("Thumbnails need the Pillow package: pip install pillow")
+        self.folder = folder
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.fresh_seconds = fresh_seconds
+        self._memory = OrderedDict()    #Maps (url,etag,size) -> decoded image, least recently used first.
+        self._memory_bytes = 0
+        self._etags = {}    #Maps url -> ETag of the file last read or fetched.
+        self._pending = {}  #Maps (url,size) -> Future of the load running for it.
+        self._failed = {}   #Maps url -> time its load failed.
+        self._disk_bytes = None     #Counted on the first write.
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1,int(workers)),thread_name_prefix="thumbnail")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.revalidated = 0    #Files on disk the server confirmed unchanged (304).
+        self.fetched = 0
+        self.decoded = 0
+
+    def cached(self,url,size):
+        '''Returns the decoded image if the memory tier has it, else None; never blocks'''
+        with self._lock:
+            key = (url,self._etags.get(url),tuple(size))
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return image
+
+    def request(self,url,size,on_ready=None):
+        '''Loads a thumbnail on the thread pool and returns its Future, or None for a URL that failed recently.
+
+        on_ready(image,error) is called from the pool thread once the load ends.
+        A request for an image already being loaded shares that load.
+        '''
+        size = tuple(size)
+        with self._lock:
+            failed_at = self._failed.get(url)
+            if failed_at is not None and time.time() - failed_at < RETRY_FAILED_SECONDS:
+                return None
+            future = self._pending.get((url,size))
+            if future is None:
+                future = self._pool.submit(self.get,url,size)
+                self._pending[(url,size)] = future
+                future.add_done_callback(lambda future: self._pending.pop((url,size),None))
+        if on_ready is not None:
+            future.add_done_callback(lambda future: None if future.cancelled() else on_ready(None if future.exception() else future.result(),future.exception()))
+        return future
+
+    def get(self,url,size):
+        '''Returns the thumbnail at url shrunk to fit size, loading and decoding it if needed; blocks'''
+        size = tuple(size)
+        image = self.cached(url,size)
+        if image is not None:
+            return image
+        try:
+            data,etag = self._load(url)
+            image = decode(data,size)
+        except Exception:
+            with self._lock:
+                self._failed[url] = time.time()
+            raise
+        with self._lock:
+            self.decoded += 1
+            self._etags[url] = etag
+            self._remember((url,etag,size),image)
+        return image
+
+    def stats(self):
+        '''Returns the hit, fetch and decode counters and the bytes held by each tier'''
+        with self._lock:
+            return {"memory_hits": self.memory_hits,"disk_hits": self.disk_hits,"revalidated": self.revalidated,"fetched": self.fetched,
+                    "decoded": self.decoded,"memory_bytes": self._memory_bytes,"disk_bytes": self._disk_bytes}
+
+    def clear(self):
+        '''Empties both tiers'''
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._etags.clear()
+            self._failed.clear()
+        with self._disk_lock:
+            for name in os.listdir(self.folder) if os.path.isdir(self.folder) else []:
+                os.remove(os.path.join(self.folder,name))
+            self._disk_bytes = 0
+
+    def close(self):
+        '''Stops the loads that have not started'''
+        self._pool.shutdown(wait=False,cancel_futures=True)
+
+    def _remember(self,key,image):
+        '''Puts a decoded image in the memory tier and drops the least recently used ones (lock held)'''
+        self._memory[key] = image
+        self._memory_bytes += image.width * image.height * len(image.getbands())
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            old = self._memory.popitem(last=False)[1]
+            self._memory_bytes -= old.width * old.height * len(old.getbands())
+
+    def _path(self,url):
+        return os.path.join(self.folder,hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def _load(self,url):
+        '''Returns (file bytes,ETag), from disk while fresh, otherwise from the server revalidating the file on disk'''
+        path = self._path(url)
+        try:
+            with open(path + ".json",encoding="utf-8") as f:
+                meta = json.load(f)     #{"url","etag","checked_at"}
+            with open(path,"rb") as f:
+                data = f.read()
+        except (OSError,ValueError):
+            meta,data = None,None
+
+        if meta is not None and time.time() - meta["checked_at"] < self.fresh_seconds:
+            with self._lock:
+                self.disk_hits += 1
+            os.utime(path)  #The modification time orders the disk eviction.
+            return data,meta["etag"]
+
+        headers = {"If-None-Match": meta["etag"]} if meta is not None and meta["etag"] else {}
+        try:
+            response = pooled_execute_request(url,headers=headers)
+            status,etag = response.status,response.headers.get("ETag")
+            body = response.read()
+        except HTTPError as e:
+            if e.code != 304:   #urlopen, used behind a proxy, raises for a 304.
+                raise
+            status,etag,body = 304,None,b""
+
+        if status == 304 and meta is not None:
+            with self._lock:
+                self.revalidated += 1
+            self._write(url,None,meta["etag"])
+            return data,meta["etag"]
+        with self._lock:
+            self.fetched += 1
+        self._write(url,body,etag)
+        return body,etag
+
+    def _write(self,url,data,etag):
+        '''Stores a fetched file (data None: just marks the file on disk as checked) and evicts old files'''
+        path = self._path(url)
+        with self._disk_lock:
+            os.makedirs(self.folder,exist_ok=True)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.folder) if entry.is_file() and "." not in entry.name)    #Image files only.
+            if data is not None:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(path + ".tmp","wb") as f:
+                    f.write(data)
+                os.replace(path + ".tmp",path)  #Readers never see half a file.
+                self._disk_bytes += len(data) - old_size
+            else:
+                os.utime(path)
+            with open(path + ".json.tmp","w",encoding="utf-8") as f:
+                json.dump({"url": url,"etag": etag,"checked_at": time.time()},f)
+            os.replace(path + ".json.tmp",path + ".json")
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _evict(self):
+        '''Deletes the least recently used files until the disk tier is back to 90% of its limit (disk lock held)'''
+        files = sorted((entry for entry in os.scandir(self.folder) if entry.is_file() and "." not in entry.name),key=lambda entry: entry.stat().st_mtime)
+        for entry in files:
+            if self._disk_bytes <= self.max_disk_bytes * 0.9:
+                break
+            size = entry.stat().st_size
+            for name in (entry.path,entry.path + ".json"):
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+            self._disk_bytes -= size
@@ -0,0 +1,51 @@
+'''Extracts the canonical video, playlist and channel IDs from YouTube URLs.
+
+These work on the URL text alone, without any network request, so they can be
+used as cache keys and to spot the same video behind different URL forms.
+'''
+
+import re
+from urllib.parse import parse_qs,urlsplit
+
+
+VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")    #Every YouTube video ID is 11 characters long.
+VIDEO_PATH = re.compile(r"^/(?:shorts|embed|live|v|e)/([A-Za-z0-9_-]{11})")  #youtube.com/shorts/<id> and friends.
+CHANNEL_PATH = re.compile(r"^/(channel/[A-Za-z0-9_-]+|@[^/]+|c/[^/]+|user/[^/]+)")   #The part of the path naming a channel.
+
+
+def video_id(url):
+    '''Returns the 11 character video ID of a watch/shorts/youtu.be URL, or None'''  #Docstring
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+
+    if host.endswith("youtu.be"):   #Short links carry the ID as the path.
+        candidate = parts.path.strip("/").split("/")[0]
+        return candidate if VIDEO_ID.match(candidate) else None
+
+    if not host.endswith("youtube.com"):
+        return None
+
+    candidate = parse_qs(parts.query).get("v",[""])[0]
+    if VIDEO_ID.match(candidate):
+        return candidate
+
+    match = VIDEO_PATH.match(parts.path)
+    return match.group(1) if match else None
+
+
+def playlist_id(url):
+    '''Returns the playlist ID of a URL with a list= parameter, or None'''  #Docstring
+    parts = urlsplit(url.strip())
+    if not parts.netloc.lower().endswith(("youtube.com","youtu.be")):
+        return None
+    candidate = parse_qs(parts.query).get("list",[""])[0]
+    return candidate or None
+
+
+def channel_key(url):
+    '''Returns the channel part of a channel URL (e.g. "channel/UC..." or "@handle"), or None'''  #Docstring
+    parts = urlsplit(url.strip())
+    if not parts.netloc.lower().endswith("youtube.com"):
+        return None
+    match = CHANNEL_PATH.match(parts.path)
+    return match.group(1) if match else None